@@ -2,41 +2,251 @@
 
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel
 from typing import List
-import uvicorn
+from contextlib import aclosing
+import logging
+import time
 import os
-import shutil
+import threading
+import hashlib
+import json
 from datetime import datetime
-import joblib
-from sentence_transformers import SentenceTransformer
-import chromadb
 import asyncio
 
 # --- 1. Corrected Imports for the new structure ---
-from src.processing.document_parser import process_new_proposal
-from src.models.novelty_analyzer import calculate_novelty
-from src.models.risk_analyzer import predict_risk
-from src.processing.financial_analyzer import analyze_budget, load_rules
+from src.processing.document_parser import parse_proposal, structure_proposal, extract_sections, PARSER_VERSION
+from src.models.novelty_analyzer import query_novelty_batch, query_chunk_novelty_batch, NOVELTY_MODE
+from src.processing.chunker import chunk_sections, CHUNK_MAX_WORDS, CHUNK_OVERLAP_WORDS
+from src.models.risk_analyzer import predict_risk, predict_risk_batch
+from src.processing.financial_analyzer import analyze_budget, analyze_budgets
+from src.core.executors import (
+    run_in_thread, run_parser, shutdown_executors, get_process_pool, MAX_CONCURRENT_FILES, PARSE_EXECUTOR
+)
+from src.core.batching import EmbeddingBatcher
+from src.core.registry import (
+    REGISTRY, get_embedding_model, get_proposal_collection, get_chunk_collection, get_risk_pipeline,
+    get_financial_rules, EMBEDDING_MODEL_NAME, RISK_PIPELINE_PATH,
+    KNOWLEDGE_BASE_PATH, FINANCIAL_RULES_PATH, VECTOR_BACKEND
+)
+from src.core.result_cache import ResultCache, artifact_fingerprint, make_cache_key
+from src.core.jobs import JobQueue, JobWorkerPool, JOB_WORKERS
+from src.core.tracing import TracingMiddleware, configure_logging, current_trace, span
+from src.core.metrics import BATCH_FILES, MetricsMiddleware, mark_worker_stopped, record_upload, render_metrics
+from src.models.document_index import DOCUMENT_INDEXES, RETRIEVER_K, get_document_index
+from src.models.document_qa import (
+    AskMetrics, GenerationBusy, GenerationLimiter, RETRIEVAL_CACHE_SIZE, build_prompt, normalize_question, stream_answer
+)
+from src.models.llm_backends import get_llm_backend
 
-# --- 2. Load all models and data ONCE at the start ---
-print("--- Server is starting: Loading all models and data... ---")
+# Log records are handed to a queue and written by a listener thread (src/core/tracing.py);
+# EVALUATOR_LOG_LEVEL=DEBUG adds per-file progress lines
+configure_logging()
+logger = logging.getLogger(__name__)
 
-FINANCIAL_RULES = load_rules('financial_rules.yaml')
-EMBEDDING_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
-db_client = chromadb.PersistentClient(path="vector_db")
-PROPOSAL_COLLECTION = db_client.get_or_create_collection(name="proposals")
-RISK_MODEL = joblib.load("trained_models/risk_model.joblib")
-TFIDF_VECTORIZER = joblib.load("trained_models/tfidf_vectorizer.joblib")
+# --- 2. Shared models and data ---
+# Models, the vector store and the rules live in the resource registry: each is
+# loaded once per process, on first use or by the startup warmup, and shared by every module.
+# Heavy libraries (torch, chromadb, sklearn, PyMuPDF, yaml) are only imported by
+# those loaders and parsers, so importing this module stays cheap.
+# EVALUATOR_WARMUP: "background" (default) loads in a daemon thread while the server already
+# answers, "blocking" loads before the first request, "0" loads everything on first use.
+WARMUP_MODE = os.getenv("EVALUATOR_WARMUP", "background").lower()
 
-print("--- All models loaded. API is ready. ---")
+# Shared front-end to the embedding model that merges encode calls from concurrent requests
+EMBEDDING_BATCHER = EmbeddingBatcher(get_embedding_model)
+
+# Cached results are only valid for the exact model, knowledge base and rules they were computed with.
+# Only results whose novelty was computed in NOVELTY_MODE itself are stored (see _cacheable);
+# "effective-mode" retires entries written before that rule by the document-mode fallback.
+RESULT_CACHE = ResultCache()
+RESULT_CACHE_VERSION = artifact_fingerprint([
+    RISK_PIPELINE_PATH,
+    KNOWLEDGE_BASE_PATH,
+    FINANCIAL_RULES_PATH
+], extra=f"{EMBEDDING_MODEL_NAME}:{VECTOR_BACKEND}:{NOVELTY_MODE}:{CHUNK_MAX_WORDS}:{CHUNK_OVERLAP_WORDS}:effective-mode")
+
+# Extracted document text keyed by file hash, so re-evaluations (e.g. after a model update) skip parsing
+TEXT_CACHE_SIZE = int(os.getenv("EVALUATOR_TEXT_CACHE_SIZE", "64"))
+TEXT_CACHE = ResultCache(TEXT_CACHE_SIZE, os.getenv("EVALUATOR_TEXT_CACHE_DB"), name="text")
+
+# Passages retrieved for recent questions, keyed by proposal id and normalized question
+RETRIEVAL_CACHE = ResultCache(RETRIEVAL_CACHE_SIZE, None, name="retrieval")
+LLM_LIMITER = GenerationLimiter()
+ASK_METRICS = AskMetrics()
+
+# Placeholder budget for proposals whose budget could not be extracted; results built on it
+# carry budget_source "default" instead of "extracted" ("total_only" when only a total was found,
+# which fails the financial check's Cost Breakdown rule)
+DEFAULT_BUDGET = {
+    "total_cost": 4500000,  # ₹45 Lakhs
+    "items": ["Advanced Sensors", "Computing Hardware", "Domestic Travel", "Research Materials", "Testing Equipment"],
+    "costs": {
+        "equipment": 1800000,     # 40% - Computing hardware, sensors, testing equipment
+        "personnel": 1350000,     # 30% - Research staff, technical experts
+        "consumables": 450000,    # 10% - Research materials, software licenses
+        "travel": 315000,         # 7% - Domestic travel for field studies
+        "contingency": 225000,    # 5% - Unexpected expenses
+        "overhead": 360000        # 8% - Administrative costs
+    }
+}
+
+
+# Uploads larger than this are rejected while they are being read
+MAX_UPLOAD_BYTES = int(os.getenv("EVALUATOR_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def _read_upload(source, max_bytes: int = MAX_UPLOAD_BYTES):
+    """
+    Reads an upload's spooled file object in chunks (runs on the I/O pool), enforcing
+    the size limit as it goes. Returns (content, sha256) where the hash is the result-cache key.
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    for block in iter(lambda: source.read(UPLOAD_CHUNK_BYTES), b""):
+        size += len(block)
+        if size > max_bytes:
+            raise ValueError(f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit.")
+        digest.update(block)
+        chunks.append(block)
+    return b"".join(chunks), digest.hexdigest()
+
+
+# Registry lookups happen on the worker thread, so a first-use load never blocks the event loop
+def _query_novelty_batch(embeddings: list) -> list:
+    with span("vector_query"):
+        return query_novelty_batch(embeddings, get_proposal_collection())
+
+
+def _query_chunk_novelty_batch(chunk_embeddings: list) -> list:
+    with span("vector_query"):
+        return query_chunk_novelty_batch(chunk_embeddings, get_chunk_collection())
+
+
+def _chunk_index_ready() -> bool:
+    return get_chunk_collection().count() > 0
+
+
+async def _calculate_novelty(contents: list) -> list:
+    """
+    Novelty reports for parsed documents (their section dicts), in order. Texts go through the
+    shared micro-batcher, then one vector query. In chunk mode every section chunk is embedded and
+    hits are aggregated per project; until the chunk index has been synced, whole documents are used.
+    Each report's novelty_mode records which of the two produced it.
+    """
+    if NOVELTY_MODE == "chunk" and await run_in_thread(_chunk_index_ready):
+        chunks = [[text for _, text in chunk_sections(content)] for content in contents]
+        with span("embed"):
+            embeddings = await EMBEDDING_BATCHER.encode_many([text for texts in chunks for text in texts])
+        per_document = []
+        offset = 0
+        for texts in chunks:
+            per_document.append(embeddings[offset:offset + len(texts)])
+            offset += len(texts)
+        reports = await run_in_thread(_query_chunk_novelty_batch, per_document)
+        return [dict(report, novelty_mode="chunk") for report in reports]
+
+    with span("embed"):
+        embeddings = await EMBEDDING_BATCHER.encode_many([" ".join(content.values()) for content in contents])
+    reports = await run_in_thread(_query_novelty_batch, embeddings)
+    return [dict(report, novelty_mode="document") for report in reports]
+
+
+def _cacheable(result: dict) -> bool:
+    """
+    False for results computed by the document-mode fallback of chunk mode: they would otherwise
+    keep being served from the result cache after the chunk index has been synced.
+    """
+    return result.get("novelty_analysis", {}).get("novelty_mode") == NOVELTY_MODE
+
+
+def _predict_risk(full_text: str) -> dict:
+    with span("risk"):
+        return predict_risk(full_text, get_risk_pipeline())
+
+
+def _predict_risk_batch(full_texts: list) -> list:
+    with span("risk"):
+        return predict_risk_batch(full_texts, get_risk_pipeline())
+
+
+def _analyze_budget(budget: dict) -> dict:
+    with span("financial"):
+        return analyze_budget(budget, get_financial_rules())
+
+
+def _analyze_budgets(budgets: list) -> list:
+    with span("financial"):
+        return analyze_budgets(budgets, get_financial_rules())
+
+
+def _budget_of(processed_data: dict) -> tuple:
+    """
+    The proposal's extracted budget and "extracted" (or "total_only" when it has no cost
+    categories), or the placeholder budget and "default".
+    """
+    budget = processed_data.get('budget')
+    if not budget:
+        return DEFAULT_BUDGET, "default"
+    return budget, "extracted" if budget.get("costs") else "total_only"
+
+
+def _from_cache(cached: dict, i: int, filename: str) -> dict:
+    """
+    Re-labels a cached full analysis for the current upload without copying its nested data.
+    The cache is keyed by content, so the stored names are those of whoever uploaded the bytes first.
+    """
+    result = dict(cached, filename=filename, file_index=i, from_cache=True)
+    result["preview"] = dict(cached["preview"], filename=filename, file_index=i)
+    result["document_content"] = dict(cached["document_content"], source_file=os.path.basename(filename))
+    return result
 
 # --- 3. Initialize the FastAPI App ---
 app = FastAPI(title="AI R&D Proposal Evaluator")
+# ?trace=true on any endpoint adds a per-stage timing breakdown ("trace") to its response
+app.add_middleware(TracingMiddleware)
+# In-flight requests and request durations per route for /metrics
+app.add_middleware(MetricsMiddleware, routes=app.routes)
 
 # Mount static files directory
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
+def _warmup():
+    logger.info("Loading all models and data...")
+    REGISTRY.warmup()
+    logger.info("All models loaded. API is ready.")
+
+@app.on_event("startup")
+def warm_up_models():
+    if WARMUP_MODE == "blocking":
+        _warmup()
+    elif WARMUP_MODE != "0":
+        threading.Thread(target=_warmup, name="evaluator-warmup", daemon=True).start()
+
+# Durable queue for /jobs; its workers run on the server's event loop
+JOB_QUEUE = None
+JOB_WORKER_POOL = None
+
+@app.on_event("startup")
+def start_job_workers():
+    global JOB_QUEUE, JOB_WORKER_POOL
+    JOB_QUEUE = JobQueue()
+    JOB_WORKER_POOL = JobWorkerPool(JOB_QUEUE, _evaluate_job_task, workers=JOB_WORKERS)
+    JOB_WORKER_POOL.start()
+
+@app.on_event("shutdown")
+def stop_executors():
+    if JOB_WORKER_POOL is not None:
+        JOB_WORKER_POOL.stop()
+    EMBEDDING_BATCHER.close()
+    shutdown_executors()
+    if REGISTRY.is_loaded("embedding_model"):
+        get_embedding_model().cache.flush()
+    mark_worker_stopped()
+
 # --- 4. API Endpoints ---
 @app.get("/")
 def read_root():
@@ -44,7 +254,26 @@ def read_root():
 
 @app.get("/api/")
 def api_info():
-    return {"message": "Welcome to the AI R&D Proposal Evaluator API"}
+    return {"message": "Welcome to the AI R&D Proposal Evaluator API", **REGISTRY.readiness()}
+
+@app.get("/api/stats")
+def api_stats():
+    """Runtime metrics for the shared pipeline components."""
+    return {
+        "embedding_batcher": EMBEDDING_BATCHER.stats(),
+        "result_cache": RESULT_CACHE.stats(),
+        "text_cache": TEXT_CACHE.stats(),
+        "document_indexes": DOCUMENT_INDEXES.stats(),
+        "retrieval_cache": RETRIEVAL_CACHE.stats(),
+        "document_qa": {**ASK_METRICS.stats(), "active": LLM_LIMITER.active, "waiting": LLM_LIMITER.waiting},
+        "embedding_cache": get_embedding_model().cache.stats() if REGISTRY.is_loaded("embedding_model") else None
+    }
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus metrics of all server workers (see PROMETHEUS_MULTIPROC_DIR)."""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
 
 @app.post("/evaluate/proposal/")
 async def evaluate_single_proposal(file: UploadFile = File(...)):
@@ -52,158 +281,558 @@ async def evaluate_single_proposal(file: UploadFile = File(...)):
     files = [file]
     result = await evaluate_multiple_proposals(files)
     if result["results"] and len(result["results"]) > 0:
-        return result["results"][0]  # Return single result for compatibility
+        return _with_trace(dict(result["results"][0]))  # Return single result for compatibility
     else:
         raise HTTPException(status_code=400, detail="Could not process the document.")
 
-@app.post("/evaluate/proposals/")
-async def evaluate_multiple_proposals(files: List[UploadFile] = File(...)):
-    print(f"🔄 Received {len(files)} files for batch processing")
+def _with_trace(response: dict) -> dict:
+    """Adds the request's timing breakdown to a response when the request is traced."""
+    trace = current_trace()
+    if trace is not None:
+        response["trace"] = trace.summary()
+    return response
+
+def _validate_batch(files: List[UploadFile]):
+    logger.info("🔄 Received %d files for batch processing", len(files))
     
     if len(files) > 10:
-        print("❌ Too many files - maximum 10 allowed")
+        logger.warning("❌ Too many files - maximum 10 allowed")
         raise HTTPException(status_code=400, detail="Maximum 10 files allowed")
     
     if len(files) == 0:
-        print("❌ No files provided")
+        logger.warning("❌ No files provided")
         raise HTTPException(status_code=400, detail="At least one file is required")
-    
-    temp_dir = "temp_uploads"
-    os.makedirs(temp_dir, exist_ok=True)
-    print(f"📁 Created temp directory: {temp_dir}")
-    
-    results = []
-    batch_summary = {
-        "total_files": len(files),
+    BATCH_FILES.observe(len(files))
+
+
+def _new_batch_summary(total_files: int) -> dict:
+    return {
+        "total_files": total_files,
         "approved_count": 0,
         "rejected_count": 0,
         "processing_timestamp": datetime.now().isoformat(),
         "files_processed": []
     }
-    
-    for i, file in enumerate(files):
-        print(f"📄 Processing file {i+1}/{len(files)}: {file.filename}")
+
+
+def _record_outcome(batch_summary: dict, file_preview: dict, overall_passed: bool):
+    """Counts one finished file in the batch summary; errors (no preview) are not counted."""
+    if file_preview is None:
+        return
+    batch_summary["files_processed"].append(file_preview)
+    if overall_passed:
+        batch_summary["approved_count"] += 1
+    else:
+        batch_summary["rejected_count"] += 1
+
+
+def _outcome_of(result: dict):
+    """(result, file_preview, overall_passed) for a cached or error result."""
+    return result, result.get("preview"), result.get("overall_approval", {}).get("overall_status") == "APPROVED"
+
+
+async def _load_upload(i: int, file: UploadFile):
+    """
+    Reads one upload straight from its spooled buffer.
+    Returns (content, sha256, None), or (None, None, error_result) on failure.
+    """
+    try:
+        content, content_sha256 = await run_in_thread(_read_upload, file.file)
+        logger.debug("📥 Read %d bytes from: %s", len(content), file.filename)
+        record_upload(file.filename, len(content))
+        return content, content_sha256, None
+    except Exception as e:
+        logger.warning("❌ Error reading %s: %s", file.filename, e)
+        return None, None, _error_result(i, file.filename, e)
+
+
+async def _extract_text(content: bytes, filename: str) -> tuple:
+    """
+    Extracts an upload's (text, budget) off the event loop. PDFs are split into page ranges (and
+    budget pages for the table finder) that run in parallel on the process pool, coordinated
+    from a thread; other formats are parsed in one task.
+    """
+    if PARSE_EXECUTOR == "process" and filename.lower().endswith(".pdf"):
+        return await run_in_thread(parse_proposal, content, filename, get_process_pool())
+    return await run_parser(parse_proposal, content, filename)
+
+
+async def _parse_content(i: int, filename: str, content: bytes, content_sha256: str, semaphore: asyncio.Semaphore):
+    """
+    Parses one in-memory upload off the event loop.
+    Returns (processed_data, None, cache_key) on success, (None, cached_result, cache_key)
+    on a result-cache hit, or (None, error_result, None) on failure.
+    """
+    async with semaphore:
+        logger.debug("📄 Processing file %d: %s", i + 1, filename)
         try:
-            # Save file temporarily
-            file_path = os.path.join(temp_dir, f"{i}_{file.filename}")
-            with open(file_path, "wb") as buffer:
-                shutil.copyfileobj(file.file, buffer)
-            print(f"💾 Saved file to: {file_path}")
+            # Identical bytes evaluated against the same artifacts: reuse the stored analysis
+            cache_key = make_cache_key(content_sha256, RESULT_CACHE_VERSION)
+            cached = await RESULT_CACHE.get_async(cache_key)
+            if cached is not None:
+                logger.debug("⚡ Result cache hit for: %s", filename)
+                return None, _from_cache(cached, i, filename), cache_key
             
-            # Process the document
-            print(f"🔍 Parsing document: {file.filename}")
-            processed_data = process_new_proposal(file_path)
+            # Process the document, reusing its extracted text and budget when these bytes were parsed before
+            text_key = make_cache_key(content_sha256, PARSER_VERSION)
+            cached_text = await TEXT_CACHE.get_async(text_key)
+            if cached_text is not None:
+                logger.debug("⚡ Text cache hit for: %s", filename)
+                raw_text, budget = cached_text["text"], cached_text["budget"]
+            else:
+                logger.debug("🔍 Parsing document: %s", filename)
+                with span("parse"):
+                    raw_text, budget = await _extract_text(content, filename)
+                if raw_text:
+                    await TEXT_CACHE.put_async(text_key, {"text": raw_text, "budget": budget})
+            with span("section"):
+                processed_data = await run_in_thread(
+                    structure_proposal, raw_text, os.path.basename(filename), budget
+                ) if raw_text else None
             if not processed_data:
-                print(f"❌ Failed to parse document: {file.filename}")
-                results.append({
-                    "filename": file.filename,
+                logger.warning("❌ Failed to parse document: %s", filename)
+                return None, {
+                    "filename": filename,
                     "status": "error",
                     "error_message": "Could not parse the document.",
                     "file_index": i
-                })
-                continue
-            
-            print(f"✅ Document parsed successfully: {file.filename}")
-            
-            # Analyze the proposal
-            full_text = " ".join(processed_data['content'].values())
-            print(f"🔬 Starting analysis for: {file.filename} (text length: {len(full_text)} chars)")
-            
-            print(f"🔬 Calculating novelty for: {file.filename}")
-            novelty_results = calculate_novelty(full_text, EMBEDDING_MODEL, PROPOSAL_COLLECTION)
-            
-            print(f"🔬 Predicting risk for: {file.filename}")
-            risk_results = predict_risk(full_text, RISK_MODEL, TFIDF_VECTORIZER)
-            
-            # Enhanced realistic budget with detailed breakdown
-            enhanced_budget = {
-                "total_cost": 4500000,  # ₹45 Lakhs
-                "items": ["Advanced Sensors", "Computing Hardware", "Domestic Travel", "Research Materials", "Testing Equipment"],
-                "costs": {
-                    "equipment": 1800000,     # 40% - Computing hardware, sensors, testing equipment
-                    "personnel": 1350000,     # 30% - Research staff, technical experts
-                    "consumables": 450000,    # 10% - Research materials, software licenses
-                    "travel": 315000,         # 7% - Domestic travel for field studies
-                    "contingency": 225000,    # 5% - Unexpected expenses
-                    "overhead": 360000        # 8% - Administrative costs
-                }
-            }
-            print(f"💰 Analyzing budget for: {file.filename}")
-            financial_results = analyze_budget(enhanced_budget, FINANCIAL_RULES)
-            
-            # Calculate overall project approval
-            overall_passed = (
-                novelty_results.get('novelty_passed', False) and
-                financial_results.get('financial_passed', False) and
-                risk_results.get('risk_passed', False)
-            )
-            
-            print(f"📊 Overall approval for {file.filename}: {'APPROVED' if overall_passed else 'REJECTED'}")
-            
-            overall_approval = {
-                "overall_status": "APPROVED" if overall_passed else "REJECTED",
-                "approval_score": f"{int((novelty_results.get('novelty_passed', 0) + financial_results.get('financial_passed', 0) + risk_results.get('risk_passed', 0)) / 3 * 100)}%",
-                "criteria_summary": {
-                    "novelty": "PASS" if novelty_results.get('novelty_passed', False) else "FAIL",
-                    "financial": "PASS" if financial_results.get('financial_passed', False) else "FAIL",
-                    "risk": "PASS" if risk_results.get('risk_passed', False) else "FAIL"
-                }
-            }
-            
-            # Create file preview data
-            file_preview = {
-                "filename": file.filename,
-                "file_index": i,
-                "status": "completed",
-                "overall_status": overall_approval["overall_status"],
-                "approval_score": overall_approval["approval_score"],
-                "novelty_similarity": novelty_results.get('max_similarity_percentage', 50),
-                "financial_health": financial_results.get('financial_health_score', 100),
-                "risk_confidence": risk_results.get('confidence_score', '78%'),
-                "file_size": len(full_text),
-                "sections_found": len(processed_data['content']) if processed_data.get('content') else 0
-            }
-            
-            # Full analysis data
-            full_analysis = {
-                "filename": file.filename,
-                "file_index": i,
-                "evaluation_timestamp": datetime.now().isoformat(),
-                "document_content": processed_data,
-                "novelty_analysis": novelty_results,
-                "financial_analysis": financial_results,
-                "risk_analysis": risk_results,
-                "overall_approval": overall_approval,
-                "preview": file_preview
-            }
+                }, None
+            # Questions about this proposal are asked with its content hash (/proposals/{id}/ask)
+            processed_data["proposal_id"] = content_sha256
             
-            results.append(full_analysis)
-            batch_summary["files_processed"].append(file_preview)
+            logger.debug("✅ Document parsed successfully: %s", filename)
             
-            if overall_passed:
-                batch_summary["approved_count"] += 1
-            else:
-                batch_summary["rejected_count"] += 1
-            
-            # Clean up temporary file
-            os.remove(file_path)
-            print(f"🗑️ Cleaned up temp file: {file_path}")
+            return processed_data, None, cache_key
             
         except Exception as e:
-            print(f"❌ Error processing {file.filename}: {str(e)}")
-            results.append({
-                "filename": file.filename,
-                "file_index": i,
-                "status": "error",
-                "error_message": str(e)
-            })
-    
-    print(f"✅ Batch processing complete. {batch_summary['approved_count']} approved, {batch_summary['rejected_count']} rejected")
+            logger.exception("❌ Error processing %s", filename)
+            return None, _error_result(i, filename, e), None
+
+
+async def _parse_upload(i: int, file: UploadFile, semaphore: asyncio.Semaphore):
+    """Reads and parses one uploaded file in memory; same return values as _parse_content."""
+    content, content_sha256, error_result = await _load_upload(i, file)
+    if error_result is not None:
+        return None, error_result, None
+    return await _parse_content(i, file.filename, content, content_sha256, semaphore)
+
+
+async def _evaluate_content(i: int, filename: str, content: bytes, content_sha256: str, semaphore: asyncio.Semaphore):
+    """
+    Runs the whole pipeline for one in-memory upload on its own, for streaming.
+    Its text still shares embedding batches with other files through the micro-batcher.
+    Returns (result, file_preview, overall_passed).
+    """
+    processed_data, result, cache_key = await _parse_content(i, filename, content, content_sha256, semaphore)
+    if processed_data is None:
+        return _outcome_of(result)
+    
+    full_text = " ".join(processed_data['content'].values())
+    try:
+        logger.debug("🔬 Calculating novelty for: %s", filename)
+        novelty_results = (await _calculate_novelty([processed_data['content']]))[0]
+    except Exception as e:
+        logger.exception("❌ Error calculating novelty for %s", filename)
+        return _error_result(i, filename, e), None, None
+    
+    outcome = await _analyze_file(i, filename, processed_data, full_text, novelty_results)
+    if outcome[1] is not None and _cacheable(outcome[0]):
+        await RESULT_CACHE.put_async(cache_key, outcome[0])
+    return outcome
+
+
+def _error_result(i: int, filename: str, error: Exception) -> dict:
     return {
+        "filename": filename,
+        "file_index": i,
+        "status": "error",
+        "error_message": str(error)
+    }
+
+
+def _build_analysis(i: int, filename: str, processed_data: dict, full_text: str,
+                    novelty_results: dict, risk_results: dict, financial_results: dict):
+    """
+    Combines the per-criterion results for one file into its full analysis and preview.
+    Returns (full_analysis, file_preview, overall_passed).
+    """
+    # Calculate overall project approval
+    overall_passed = (
+        novelty_results.get('novelty_passed', False) and
+        financial_results.get('financial_passed', False) and
+        risk_results.get('risk_passed', False)
+    )
+    
+    logger.debug("📊 Overall approval for %s: %s", filename, "APPROVED" if overall_passed else "REJECTED")
+    
+    overall_approval = {
+        "overall_status": "APPROVED" if overall_passed else "REJECTED",
+        "approval_score": f"{int((novelty_results.get('novelty_passed', 0) + financial_results.get('financial_passed', 0) + risk_results.get('risk_passed', 0)) / 3 * 100)}%",
+        "criteria_summary": {
+            "novelty": "PASS" if novelty_results.get('novelty_passed', False) else "FAIL",
+            "financial": "PASS" if financial_results.get('financial_passed', False) else "FAIL",
+            "risk": "PASS" if risk_results.get('risk_passed', False) else "FAIL"
+        }
+    }
+    
+    # Create file preview data
+    file_preview = {
+        "filename": filename,
+        "file_index": i,
+        "proposal_id": processed_data.get("proposal_id"),
+        "status": "completed",
+        "overall_status": overall_approval["overall_status"],
+        "approval_score": overall_approval["approval_score"],
+        "novelty_similarity": novelty_results.get('max_similarity_percentage', 50),
+        "financial_health": financial_results.get('financial_health_score', 100),
+        "risk_confidence": risk_results.get('confidence_score', '78%'),
+        "file_size": len(full_text),
+        "sections_found": len(processed_data['content']) if processed_data.get('content') else 0
+    }
+    
+    # Full analysis data
+    full_analysis = {
+        "filename": filename,
+        "file_index": i,
+        "proposal_id": processed_data.get("proposal_id"),
+        "evaluation_timestamp": datetime.now().isoformat(),
+        "document_content": processed_data,
+        "novelty_analysis": novelty_results,
+        "financial_analysis": financial_results,
+        "risk_analysis": risk_results,
+        "overall_approval": overall_approval,
+        "preview": file_preview
+    }
+    
+    return full_analysis, file_preview, overall_passed
+
+
+async def _analyze_file(i: int, filename: str, processed_data: dict, full_text: str, novelty_results: dict,
+                        risk_results: dict = None, financial_results: dict = None):
+    """
+    Runs risk and financial analysis for one parsed file (unless already done with its batch)
+    and assembles its result.
+    """
+    try:
+        if risk_results is None:
+            logger.debug("🔬 Predicting risk for: %s", filename)
+            risk_results = await run_in_thread(_predict_risk, full_text)
+        
+        if financial_results is None:
+            logger.debug("💰 Analyzing budget for: %s", filename)
+            budget, budget_source = _budget_of(processed_data)
+            financial_results = await run_in_thread(_analyze_budget, budget)
+            financial_results["budget_source"] = budget_source
+        
+        return _build_analysis(i, filename, processed_data, full_text, novelty_results, risk_results, financial_results)
+    except Exception as e:
+        logger.exception("❌ Error processing %s", filename)
+        return _error_result(i, filename, e), None, None
+
+
+@app.post("/evaluate/proposals/")
+async def evaluate_multiple_proposals(files: List[UploadFile] = File(...)):
+    _validate_batch(files)
+    
+    results = []
+    batch_summary = _new_batch_summary(len(files))
+    
+    # Stage 1: parse files concurrently, at most MAX_CONCURRENT_FILES at a time; gather keeps upload order.
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILES)
+    parsed = await asyncio.gather(*(
+        _parse_upload(i, file, semaphore) for i, file in enumerate(files)
+    ))
+    parsed_indices = [i for i, (processed_data, _, _) in enumerate(parsed) if processed_data]
+    full_texts = {i: " ".join(parsed[i][0]['content'].values()) for i in parsed_indices}
+    
+    # Stage 2: novelty for every parsed file, encoded together with texts from concurrent requests.
+    novelty_by_index = {}
+    if parsed_indices:
+        logger.debug("🔬 Calculating novelty for %d files", len(parsed_indices))
+        try:
+            novelty_list = await _calculate_novelty([parsed[i][0]['content'] for i in parsed_indices])
+            novelty_by_index = dict(zip(parsed_indices, novelty_list))
+        except Exception as e:
+            logger.exception("❌ Error calculating novelty")
+            for i in parsed_indices:
+                parsed[i] = (None, _error_result(i, files[i].filename, e), None)
+            parsed_indices = []
+    
+    # Stage 3: risk for every parsed file in one pipeline call, budgets in one rule-program pass, then assembly.
+    risk_by_index, financial_by_index = {}, {}
+    if parsed_indices:
+        logger.debug("🔬 Predicting risk for %d files", len(parsed_indices))
+        try:
+            risk_list = await run_in_thread(_predict_risk_batch, [full_texts[i] for i in parsed_indices])
+            risk_by_index = dict(zip(parsed_indices, risk_list))
+        except Exception as e:
+            logger.exception("❌ Error predicting risk")
+            for i in parsed_indices:
+                parsed[i] = (None, _error_result(i, files[i].filename, e), None)
+            parsed_indices = []
+    if parsed_indices:
+        logger.debug("💰 Analyzing budgets for %d files", len(parsed_indices))
+        budgets = [_budget_of(parsed[i][0]) for i in parsed_indices]
+        try:
+            financial_list = await run_in_thread(_analyze_budgets, [budget for budget, _ in budgets])
+            for financial_results, (_, budget_source) in zip(financial_list, budgets):
+                financial_results["budget_source"] = budget_source
+            financial_by_index = dict(zip(parsed_indices, financial_list))
+        except Exception:
+            # Analyzed file by file instead, so one bad budget only fails its own file
+            logger.exception("❌ Error analyzing budgets as a batch")
+    analyzed = dict(zip(parsed_indices, await asyncio.gather(*(
+        _analyze_file(i, files[i].filename, parsed[i][0], full_texts[i], novelty_by_index[i], risk_by_index[i],
+                      financial_by_index.get(i))
+        for i in parsed_indices
+    ))))
+    
+    for i in range(len(files)):
+        if i in analyzed:
+            result, file_preview, overall_passed = analyzed[i]
+            if file_preview is not None and _cacheable(result):
+                await RESULT_CACHE.put_async(parsed[i][2], result)
+        else:
+            result, file_preview, overall_passed = _outcome_of(parsed[i][1])
+        results.append(result)
+        _record_outcome(batch_summary, file_preview, overall_passed)
+    
+    logger.info(
+        "✅ Batch processing complete. %d approved, %d rejected",
+        batch_summary["approved_count"], batch_summary["rejected_count"]
+    )
+    return _with_trace({
         "batch_summary": batch_summary,
         "results": results
+    })
+
+@app.post("/evaluate/proposals/stream")
+async def evaluate_multiple_proposals_stream(files: List[UploadFile] = File(...)):
+    """
+    Streaming variant of /evaluate/proposals/ (NDJSON, one JSON object per line).
+    Emits {"event": "file", ...} with each file's preview and full analysis as soon as
+    that file finishes, then {"event": "batch_summary", ...} last. Only previews are
+    kept server-side for the summary, never the whole batch response.
+    """
+    _validate_batch(files)
+    
+    # Uploads are read before the response starts: the form's files are closed once the endpoint returns.
+    loaded = await asyncio.gather(*(_load_upload(i, file) for i, file in enumerate(files)))
+    filenames = [file.filename for file in files]
+    
+    async def events():
+        batch_summary = _new_batch_summary(len(filenames))
+        previews = {}
+        
+        async def evaluate(i: int, content: bytes, content_sha256: str, error_result: dict):
+            if error_result is not None:
+                return _outcome_of(error_result)
+            return await _evaluate_content(i, filenames[i], content, content_sha256, semaphore)
+        
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_FILES)
+        tasks = [asyncio.create_task(evaluate(i, *loaded[i])) for i in range(len(filenames))]
+        loaded.clear()  # each task now owns its upload's bytes
+        try:
+            for finished in asyncio.as_completed(tasks):
+                result, file_preview, overall_passed = await finished
+                _record_outcome(batch_summary, file_preview, overall_passed)
+                if file_preview is not None:
+                    previews[file_preview["file_index"]] = file_preview
+                yield json.dumps({
+                    "event": "file",
+                    "file_index": result["file_index"],
+                    "preview": file_preview,
+                    "result": result
+                }) + "\n"
+            
+            # Same ordering as the non-streaming endpoint: upload order, not completion order
+            batch_summary["files_processed"] = [previews[i] for i in sorted(previews)]
+            logger.info(
+                "✅ Batch processing complete. %d approved, %d rejected",
+                batch_summary["approved_count"], batch_summary["rejected_count"]
+            )
+            yield json.dumps(_with_trace({"event": "batch_summary", "batch_summary": batch_summary})) + "\n"
+        finally:
+            # Client went away mid-stream: stop the files still in flight
+            for task in tasks:
+                task.cancel()
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+async def _evaluate_job_task(task: dict) -> dict:
+    """
+    Evaluates one queued file. Error results are raised so the queue retries them;
+    on the last attempt the error result itself is stored as the file's outcome.
+    """
+    result, _, _ = await _evaluate_content(
+        task["file_index"], task["filename"], task["content"], task["content_sha256"],
+        asyncio.Semaphore(1)
+    )
+    if result.get("status") == "error" and task["attempts"] < JOB_QUEUE.max_attempts:
+        raise RuntimeError(result.get("error_message", "Evaluation failed"))
+    return result
+
+
+@app.post("/jobs", status_code=202)
+async def submit_job(files: List[UploadFile] = File(...)):
+    """
+    Queues any number of proposals for background evaluation and returns a job id at once.
+    Poll GET /jobs/{job_id} for progress and partial results.
+    """
+    if len(files) == 0:
+        raise HTTPException(status_code=400, detail="At least one file is required")
+    
+    queued = []
+    for i, file in enumerate(files):
+        content, content_sha256, error_result = await _load_upload(i, file)
+        if error_result is not None:
+            raise HTTPException(status_code=400, detail=f"{file.filename}: {error_result['error_message']}")
+        queued.append((file.filename, content, content_sha256))
+    
+    BATCH_FILES.observe(len(queued))
+    job_id = await run_in_thread(JOB_QUEUE.submit, queued)
+    logger.info("📥 Queued job %s with %d files", job_id, len(queued))
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "total_files": len(queued),
+        "status_url": f"/jobs/{job_id}"
     }
 
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, include_results: bool = True):
+    """Progress of a job, its finished results so far, and the batch summary once it is complete."""
+    job = await run_in_thread(JOB_QUEUE.job_status, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+    results = []
+    for task in job["tasks"]:
+        counts[task["status"]] += 1
+        if task["status"] == "done":
+            results.append(task["result"])
+        elif task["status"] == "failed":
+            results.append(_error_result(task["file_index"], task["filename"], task["error"]))
+    
+    finished = counts["done"] + counts["failed"]
+    if finished == job["total_files"]:
+        status = "completed"
+    elif counts["running"] or finished:
+        status = "running"
+    else:
+        status = "queued"
+    
+    response = {
+        "job_id": job_id,
+        "status": status,
+        "progress": {
+            "total_files": job["total_files"],
+            "finished": finished,
+            "queued": counts["queued"],
+            "running": counts["running"],
+            "failed": counts["failed"],
+            "percent": int(finished / job["total_files"] * 100) if job["total_files"] else 100
+        }
+    }
+    if status == "completed":
+        batch_summary = _new_batch_summary(job["total_files"])
+        batch_summary["processing_timestamp"] = datetime.fromtimestamp(job["created_at"]).isoformat()
+        for result in results:
+            _record_outcome(batch_summary, *_outcome_of(result)[1:])
+        response["batch_summary"] = batch_summary
+    if include_results:
+        response["results"] = results
+    return response
+
+class AskRequest(BaseModel):
+    question: str
+    k: int = RETRIEVER_K
+
+
+def _proposal_sections(proposal_id: str) -> dict:
+    """Sections of an evaluated proposal, from the text or result cache; LookupError if neither has it."""
+    cached_text = TEXT_CACHE.get(make_cache_key(proposal_id, PARSER_VERSION))
+    if cached_text is not None:
+        return extract_sections(cached_text["text"])
+    cached = RESULT_CACHE.get(make_cache_key(proposal_id, RESULT_CACHE_VERSION))
+    if cached is not None:
+        return cached["document_content"]["content"]
+    raise LookupError(proposal_id)
+
+
+async def _retrieve_passages(proposal_id: str, question: str, k: int) -> tuple:
+    """(passages, from_cache) for a question. The proposal's index is built on its first question."""
+    key = make_cache_key(proposal_id, f"{k}:{normalize_question(question)}")
+    passages = RETRIEVAL_CACHE.get(key)
+    if passages is not None:
+        return passages, True
+    with span("index"):
+        index = await run_in_thread(get_document_index, proposal_id, lambda: _proposal_sections(proposal_id))
+    with span("embed"):
+        query_embedding = await EMBEDDING_BATCHER.encode(question)
+    with span("vector_query"):
+        passages = [passage._asdict() for passage in index.search_embedding(query_embedding, k)]
+    RETRIEVAL_CACHE.put(key, passages)
+    return passages, False
+
+
+@app.post("/proposals/{proposal_id}/ask")
+async def ask_proposal(proposal_id: str, request: AskRequest):
+    """
+    Answers a question about an evaluated proposal (proposal_id comes from its evaluation result).
+    Streams NDJSON: {"event": "context", ...} with the retrieved passages, one
+    {"event": "token", "text": ...} per generated piece, then {"event": "done", ...} with the
+    time to first token and generation timings ({"event": "error", ...} if generation fails).
+    """
+    started = time.perf_counter()
+    question = request.question.strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Question must not be empty")
+    if not 1 <= request.k <= 10:
+        raise HTTPException(status_code=400, detail="k must be between 1 and 10")
+    if LLM_LIMITER.full():
+        ASK_METRICS.rejected += 1
+        raise HTTPException(status_code=503, detail="Too many questions in progress, retry shortly")
+    
+    try:
+        passages, retrieval_cached = await _retrieve_passages(proposal_id, question, request.k)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Proposal not found; evaluate it first")
+    ASK_METRICS.questions += 1
+    ASK_METRICS.retrieval_cache_hits += retrieval_cached
+    retrieval_ms = round((time.perf_counter() - started) * 1000, 3)
+    prompt = build_prompt(question, passages)
+    backend = get_llm_backend()
+    logger.debug("💬 Question about %s (%d passages, retrieval %s ms)", proposal_id[:12], len(passages), retrieval_ms)
+    
+    async def events():
+        yield json.dumps({
+            "event": "context",
+            "proposal_id": proposal_id,
+            "passages": passages,
+            "retrieval_cached": retrieval_cached,
+            "retrieval_ms": retrieval_ms
+        }) + "\n"
+        try:
+            # aclosing releases the generation slot as soon as the client goes away
+            async with aclosing(stream_answer(backend, prompt, LLM_LIMITER, ASK_METRICS, started)) as answer:
+                async for kind, payload in answer:
+                    if kind == "token":
+                        yield json.dumps({"event": "token", "text": payload}) + "\n"
+                    else:
+                        yield json.dumps(_with_trace({"event": "done", **payload})) + "\n"
+        except GenerationBusy as e:
+            # Admitted together with a burst of other questions that filled the limiter first
+            ASK_METRICS.rejected += 1
+            yield json.dumps({"event": "error", "error_message": str(e)}) + "\n"
+        except Exception as e:
+            logger.exception("❌ Error answering question about %s", proposal_id[:12])
+            yield json.dumps({"event": "error", "error_message": str(e)}) + "\n"
+    
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
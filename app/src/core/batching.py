@@ -0,0 +1,132 @@
+# src/core/batching.py
+
+import asyncio
+import os
+import time
+
+from src.core.executors import run_in_thread
+from src.core.metrics import EMBEDDING_BATCH_SIZE
+
+# --- Micro-batching configuration (overridable through environment variables) ---
+BATCH_MAX_ITEMS = int(os.getenv("EVALUATOR_BATCH_MAX_ITEMS", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("EVALUATOR_BATCH_MAX_WAIT_MS", "10"))
+
+# Upper bounds of the batch-size and wait-time histogram buckets
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+WAIT_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 1000)
+
+
+def _bucket_label(value: float, buckets: tuple) -> str:
+    for bound in buckets:
+        if value <= bound:
+            return f"<={bound}"
+    return f">{buckets[-1]}"
+
+
+class EmbeddingBatcher:
+    """
+    Async micro-batcher in front of a shared SentenceTransformer.
+    model_provider is a zero-argument callable returning the model, so the model
+    can be loaded lazily on the first batch.
+    Encode requests from concurrent coroutines are collected for up to max_wait_ms
+    or max_batch_size items, encoded in one model call on the I/O thread pool,
+    and the vectors are handed back to each awaiting coroutine.
+    """
+
+    def __init__(self, model_provider, max_batch_size: int = BATCH_MAX_ITEMS, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.model_provider = model_provider
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        # Metrics
+        self.batches_run = 0
+        self.items_encoded = 0
+        self.batch_size_histogram = {_bucket_label(b, BATCH_SIZE_BUCKETS): 0 for b in BATCH_SIZE_BUCKETS}
+        self.batch_size_histogram[f">{BATCH_SIZE_BUCKETS[-1]}"] = 0
+        self.wait_ms_histogram = {_bucket_label(b, WAIT_MS_BUCKETS): 0 for b in WAIT_MS_BUCKETS}
+        self.wait_ms_histogram[f">{WAIT_MS_BUCKETS[-1]}"] = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_observed_ms = 0.0
+
+    def _ensure_worker(self):
+        """Starts the collector task on the running loop (restarting it if the loop changed)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def encode(self, text: str) -> list:
+        """Returns the embedding of one text as a list of floats."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def encode_many(self, texts: list) -> list:
+        """Returns embeddings for several texts. Each text joins the shared queue individually."""
+        return list(await asyncio.gather(*(self.encode(text) for text in texts)))
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self._encode_batch(batch)
+
+    async def _encode_batch(self, batch: list):
+        started = time.perf_counter()
+        for _, _, enqueued_at in batch:
+            wait_ms = (started - enqueued_at) * 1000
+            self.total_wait_ms += wait_ms
+            self.max_wait_observed_ms = max(self.max_wait_observed_ms, wait_ms)
+            self.wait_ms_histogram[_bucket_label(wait_ms, WAIT_MS_BUCKETS)] += 1
+        self.batches_run += 1
+        self.items_encoded += len(batch)
+        self.batch_size_histogram[_bucket_label(len(batch), BATCH_SIZE_BUCKETS)] += 1
+        EMBEDDING_BATCH_SIZE.observe(len(batch))
+
+        texts = [text for text, _, _ in batch]
+        try:
+            embeddings = await run_in_thread(self._encode, texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), embedding in zip(batch, embeddings):
+            if not future.done():
+                future.set_result(embedding.tolist())
+
+    def _encode(self, texts: list):
+        return self.model_provider().encode(texts, batch_size=self.max_batch_size)
+
+    def stats(self) -> dict:
+        """Queue depth, batch-size histogram and wait-time metrics."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches_run": self.batches_run,
+            "items_encoded": self.items_encoded,
+            "average_batch_size": round(self.items_encoded / self.batches_run, 2) if self.batches_run else 0,
+            "batch_size_histogram": self.batch_size_histogram,
+            "wait_ms_histogram": self.wait_ms_histogram,
+            "average_wait_ms": round(self.total_wait_ms / self.items_encoded, 3) if self.items_encoded else 0,
+            "max_wait_ms_observed": round(self.max_wait_observed_ms, 3)
+        }
+
+    def close(self):
+        """Cancels the collector task."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
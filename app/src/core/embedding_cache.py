@@ -0,0 +1,238 @@
+# src/core/embedding_cache.py
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from src.core.metrics import cache_counters
+
+logger = logging.getLogger(__name__)
+
+# --- Embedding cache configuration (overridable through environment variables) ---
+# The cache is single-writer: each process locks one copy of it, <dir>/<model> or, when another
+# process (a second server worker, the knowledge-base sync CLI) holds that, <dir>/<model>.1, .2, ...
+EMBEDDING_CACHE_DIR = os.getenv("EVALUATOR_EMBEDDING_CACHE_DIR", "embedding_cache")
+EMBEDDING_CACHE_SIZE = int(os.getenv("EVALUATOR_EMBEDDING_CACHE_SIZE", "50000"))
+
+KEY_BYTES = 16
+
+
+def normalize_text(text: str) -> str:
+    """Collapses whitespace so re-flowed copies of the same text share one cache entry."""
+    return " ".join(text.split())
+
+
+def text_key(text: str) -> bytes:
+    """Cache key of a text: truncated SHA-256 of its normalized form."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).digest()[:KEY_BYTES]
+
+
+def _try_lock(path: str):
+    """Takes an exclusive, non-blocking lock on path/lock; returns the open lock file, or None if it is held."""
+    os.makedirs(path, exist_ok=True)
+    handle = open(os.path.join(path, "lock"), "a+b")
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        return None
+    return handle
+
+
+def _lock_cache_dir(base_path: str) -> tuple:
+    """(path, lock file) of the first copy of the cache at base_path that no other process is using."""
+    copy = 0
+    while True:
+        path = base_path if copy == 0 else f"{base_path}.{copy}"
+        handle = _try_lock(path)
+        if handle is not None:
+            return path, handle
+        copy += 1
+
+
+class EmbeddingCache:
+    """
+    Persistent map from normalized-text hash to float32 embedding with LRU eviction.
+    Vectors live in a memory-mapped (capacity, dim) array; a parallel memory-mapped
+    key array is the index and a tick array records recency, so the cache is rebuilt
+    from disk on start-up and a slot is never read back under the wrong key.
+    The slot map lives in this process only, so a cache directory is locked by one
+    process at a time; a process that finds it taken opens a numbered copy instead.
+    """
+
+    def __init__(self, cache_dir: str = EMBEDDING_CACHE_DIR, capacity: int = EMBEDDING_CACHE_SIZE,
+                 namespace: str = "all-MiniLM-L6-v2"):
+        self.path, self._dir_lock = _lock_cache_dir(os.path.join(cache_dir, namespace.replace("/", "__")))
+        self.capacity = capacity
+        self.dim = None
+        self._lock = threading.Lock()
+        self._slots = OrderedDict()  # key -> slot, least recently used first
+        self._free = []
+        self._tick = 0
+        self._vectors = None
+        self._keys = None
+        self._ticks = None
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter, self._miss_counter = cache_counters("embedding")
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        try:
+            with open(self._file("meta.json"), "r") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if meta.get("capacity") != self.capacity:
+            logger.info("Embedding cache capacity changed; starting with an empty cache.")
+            return
+        self._open(meta["dim"], mode="r+")
+        occupied = np.flatnonzero(self._ticks)
+        for slot in occupied[np.argsort(self._ticks[occupied])]:
+            self._slots[self._keys[slot].tobytes()] = int(slot)
+        self._free = sorted(set(range(self.capacity)) - set(self._slots.values()), reverse=True)
+        self._tick = int(self._ticks.max()) if len(occupied) else 0
+
+    def _open(self, dim: int, mode: str):
+        os.makedirs(self.path, exist_ok=True)
+        self.dim = dim
+        self._vectors = np.memmap(self._file("vectors.f32"), dtype=np.float32, mode=mode, shape=(self.capacity, dim))
+        self._keys = np.memmap(self._file("keys.bin"), dtype=np.uint8, mode=mode, shape=(self.capacity, KEY_BYTES))
+        self._ticks = np.memmap(self._file("ticks.i64"), dtype=np.int64, mode=mode, shape=(self.capacity,))
+        if mode == "w+":
+            with open(self._file("meta.json"), "w") as f:
+                json.dump({"dim": dim, "capacity": self.capacity}, f)
+            self._free = list(range(self.capacity - 1, -1, -1))
+
+    def get_many(self, keys: list) -> list:
+        """Returns the cached vector for each key, or None where it is missing."""
+        found = []
+        hits = 0
+        with self._lock:
+            for key in keys:
+                slot = self._slots.get(key)
+                # A slot whose stored key differs was rewritten outside this map: never serve it
+                if slot is None or self._keys[slot].tobytes() != key:
+                    self.misses += 1
+                    found.append(None)
+                    continue
+                hits += 1
+                self._slots.move_to_end(key)
+                self._tick += 1
+                self._ticks[slot] = self._tick
+                found.append(np.array(self._vectors[slot]))
+            self.hits += hits
+        self._hit_counter.inc(hits)
+        self._miss_counter.inc(len(keys) - hits)
+        return found
+
+    def put_many(self, keys: list, vectors) -> None:
+        """Stores vectors under their keys, evicting least recently used entries when full."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if not len(keys):
+            return
+        with self._lock:
+            if self._vectors is None:
+                self._open(vectors.shape[1], mode="w+")
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match cache dimension {self.dim}")
+            for key, vector in zip(keys, vectors):
+                slot = self._slots.get(key)
+                if slot is None:
+                    if self._free:
+                        slot = self._free.pop()
+                    else:
+                        _, slot = self._slots.popitem(last=False)
+                    self._slots[key] = slot
+                self._slots.move_to_end(key)
+                self._tick += 1
+                # Vector first, then key: a slot only claims a key once its vector is in place
+                self._vectors[slot] = vector
+                self._keys[slot] = np.frombuffer(key, dtype=np.uint8)
+                self._ticks[slot] = self._tick
+
+    def flush(self):
+        """Writes dirty pages of the memory-mapped arrays to disk."""
+        with self._lock:
+            for array in (self._vectors, self._keys, self._ticks):
+                if array is not None:
+                    array.flush()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._slots),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0
+        }
+
+
+class CachedEncoder:
+    """
+    Drop-in wrapper around a SentenceTransformer whose encode() consults the
+    embedding cache first and only runs the model for texts it has not seen.
+    """
+
+    def __init__(self, model, cache: EmbeddingCache):
+        self.model = model
+        self.cache = cache
+
+    def encode(self, sentences, batch_size: int = 32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return self.model.encode(texts, batch_size=batch_size, **kwargs)
+
+        keys = [text_key(text) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Encode each distinct missing text once, in a single model call
+        missing = OrderedDict()
+        for key, text, vector in zip(keys, texts, vectors):
+            if vector is None:
+                missing.setdefault(key, text)
+        if missing:
+            fresh = np.asarray(self.model.encode(list(missing.values()), batch_size=batch_size, **kwargs), dtype=np.float32)
+            self.cache.put_many(list(missing), fresh)
+            fresh_by_key = dict(zip(missing, fresh))
+            vectors = [vector if vector is not None else fresh_by_key[key] for key, vector in zip(keys, vectors)]
+
+        embeddings = np.stack(vectors)
+        return embeddings[0] if single else embeddings
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Returns the process-wide embedding cache, opening it on first use."""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = EmbeddingCache()
+            atexit.register(_shared_cache.flush)
+        return _shared_cache
@@ -0,0 +1,69 @@
+# src/core/executors.py
+
+import asyncio
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+
+# --- Executor configuration (overridable through environment variables) ---
+# Threads serve the I/O-bound and GIL-releasing work (file copies, model inference,
+# vector queries); processes serve the CPU-bound PyMuPDF / DOCX extraction.
+IO_WORKERS = int(os.getenv("EVALUATOR_IO_WORKERS", "8"))
+CPU_WORKERS = int(os.getenv("EVALUATOR_CPU_WORKERS", str(min(4, os.cpu_count() or 1))))
+PARSE_EXECUTOR = os.getenv("EVALUATOR_PARSE_EXECUTOR", "process").lower()  # "process" or "thread"
+MAX_CONCURRENT_FILES = int(os.getenv("EVALUATOR_MAX_CONCURRENT_FILES", "4"))
+
+_thread_pool = None
+_process_pool = None
+
+
+def get_thread_pool() -> ThreadPoolExecutor:
+    """Returns the shared thread pool, creating it on first use."""
+    global _thread_pool
+    if _thread_pool is None:
+        _thread_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="evaluator-io")
+    return _thread_pool
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Returns the shared process pool, creating it on first use."""
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=CPU_WORKERS)
+    return _process_pool
+
+
+async def run_in_thread(func, *args, **kwargs):
+    """
+    Runs a blocking callable on the I/O thread pool without blocking the event loop.
+    Like asyncio.to_thread, it runs in a copy of the caller's context, so the request's
+    trace (src/core/tracing.py) sees spans recorded in the thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_thread_pool(), partial(context.run, func, *args, **kwargs))
+
+
+async def run_in_process(func, *args, **kwargs):
+    """Runs a CPU-bound callable on the process pool. The callable and its arguments must be picklable."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_process_pool(), partial(func, *args, **kwargs))
+
+
+async def run_parser(func, *args, **kwargs):
+    """Runs a document-parsing callable on the executor selected by EVALUATOR_PARSE_EXECUTOR."""
+    if PARSE_EXECUTOR == "process":
+        return await run_in_process(func, *args, **kwargs)
+    return await run_in_thread(func, *args, **kwargs)
+
+
+def shutdown_executors():
+    """Shuts down both pools. Called when the server stops."""
+    global _thread_pool, _process_pool
+    if _thread_pool is not None:
+        _thread_pool.shutdown(wait=False, cancel_futures=True)
+        _thread_pool = None
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
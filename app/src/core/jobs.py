@@ -0,0 +1,233 @@
+# src/core/jobs.py
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from src.core.executors import run_in_thread
+
+logger = logging.getLogger(__name__)
+
+# --- Job queue configuration (overridable through environment variables) ---
+JOBS_DB = os.getenv("EVALUATOR_JOBS_DB", "jobs/jobs.sqlite")
+JOB_WORKERS = int(os.getenv("EVALUATOR_JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("EVALUATOR_JOB_MAX_ATTEMPTS", "3"))
+# A running task whose lease expires (e.g. its worker process died) is handed to another worker;
+# a live worker renews its lease every third of this time, however long the evaluation takes
+JOB_LEASE_SECONDS = float(os.getenv("EVALUATOR_JOB_LEASE_SECONDS", "600"))
+JOB_POLL_SECONDS = float(os.getenv("EVALUATOR_JOB_POLL_SECONDS", "0.5"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    total_files INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    file_index INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    content BLOB,
+    content_sha256 TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tasks_by_status ON tasks (status, id);
+CREATE INDEX IF NOT EXISTS tasks_by_job ON tasks (job_id, file_index);
+"""
+
+
+class JobQueue:
+    """
+    Durable, SQLite-backed queue of evaluation tasks (one task per uploaded file).
+    Tasks are claimed under a time-limited lease. Failed or abandoned tasks are retried
+    up to max_attempts, and a task is completed at most once: only the current lease
+    holder can record its result.
+    """
+
+    def __init__(self, db_path: str = JOBS_DB, max_attempts: int = JOB_MAX_ATTEMPTS,
+                 lease_seconds: float = JOB_LEASE_SECONDS):
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+
+    def submit(self, files: list) -> str:
+        """Enqueues a job. files is a list of (filename, content, content_sha256). Returns the job id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute("INSERT INTO jobs (id, total_files, created_at) VALUES (?, ?, ?)", (job_id, len(files), now))
+                self._db.executemany(
+                    "INSERT INTO tasks (job_id, file_index, filename, content, content_sha256, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    [(job_id, i, filename, content, sha, now) for i, (filename, content, sha) in enumerate(files)]
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return job_id
+
+    def claim(self, owner: str):
+        """
+        Leases the oldest runnable task to owner: a queued task, or a running one whose lease
+        expired. Tasks that have used up their attempts are marked failed instead.
+        Returns a dict with the task's fields, or None when nothing is runnable.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.execute(
+                    "UPDATE tasks SET status = 'failed', content = NULL, error = COALESCE(error, 'Lease expired'), updated_at = ? "
+                    "WHERE status = 'running' AND lease_expires < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                row = self._db.execute(
+                    "SELECT id, job_id, file_index, filename, content, content_sha256, attempts FROM tasks "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is not None:
+                    self._db.execute(
+                        "UPDATE tasks SET status = 'running', lease_owner = ?, lease_expires = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (owner, now + self.lease_seconds, now, row["id"])
+                    )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return dict(row, attempts=row["attempts"] + 1) if row is not None else None
+
+    def complete(self, task_id: int, owner: str, result: dict) -> bool:
+        """Records a task's result if owner still holds its lease. Returns False for a stale worker."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE tasks SET status = 'done', result = ?, content = NULL, error = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (json.dumps(result), time.time(), task_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def renew(self, task_id: int, owner: str) -> bool:
+        """Extends owner's lease on a running task. Returns False if the lease was already lost."""
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE tasks SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (now + self.lease_seconds, now, task_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, owner: str, error: str) -> bool:
+        """Requeues a task after an error, or marks it failed once its attempts are used up."""
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+                "content = CASE WHEN attempts >= ? THEN NULL ELSE content END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (self.max_attempts, self.max_attempts, error, time.time(), task_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def job_status(self, job_id: str):
+        """Returns the job's task rows ordered by file index, or None for an unknown job."""
+        with self._lock:
+            job = self._db.execute("SELECT id, total_files, created_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if job is None:
+                return None
+            tasks = self._db.execute(
+                "SELECT file_index, filename, status, attempts, result, error FROM tasks WHERE job_id = ? ORDER BY file_index",
+                (job_id,)
+            ).fetchall()
+        return {
+            "job_id": job["id"],
+            "total_files": job["total_files"],
+            "created_at": job["created_at"],
+            "tasks": [
+                dict(task, result=json.loads(task["result"]) if task["result"] else None)
+                for task in tasks
+            ]
+        }
+
+
+class JobWorkerPool:
+    """
+    Async workers that drain a JobQueue on the server's event loop.
+    evaluate is a coroutine function taking a claimed task dict and returning a JSON-serializable result.
+    """
+
+    def __init__(self, queue: JobQueue, evaluate, workers: int = JOB_WORKERS, poll_seconds: float = JOB_POLL_SECONDS):
+        self.queue = queue
+        self.evaluate = evaluate
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self._tasks = []
+
+    def start(self):
+        owner_prefix = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._tasks = [
+            asyncio.get_running_loop().create_task(self._work(f"{owner_prefix}-{n}"))
+            for n in range(self.workers)
+        ]
+
+    async def _work(self, owner: str):
+        while True:
+            try:
+                task = await run_in_thread(self.queue.claim, owner)
+            except Exception as e:
+                logger.error("❌ Job queue unavailable: %s", e)
+                task = None
+            if task is None:
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            renewal = asyncio.get_running_loop().create_task(self._keep_leased(task["id"], owner))
+            try:
+                result = await self.evaluate(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("❌ Job task %s failed (attempt %d): %s", task["id"], task["attempts"], e)
+                await run_in_thread(self.queue.fail, task["id"], owner, str(e))
+                continue
+            finally:
+                renewal.cancel()
+            if not await run_in_thread(self.queue.complete, task["id"], owner, result):
+                logger.warning("⚠️ Discarded result of job task %s: lease was lost", task["id"])
+
+    async def _keep_leased(self, task_id: int, owner: str):
+        """Renews a task's lease while it is being evaluated, so long evaluations are not claimed twice."""
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                if not await run_in_thread(self.queue.renew, task_id, owner):
+                    logger.warning("⚠️ Lease on job task %s was lost while it ran", task_id)
+                    return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Could not renew the lease on job task %s: %s", task_id, e)
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
@@ -0,0 +1,128 @@
+# src/core/metrics.py
+
+import os
+import time
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY as DEFAULT_REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+)
+from starlette.routing import Match
+
+# --- Prometheus configuration ---
+# Set (to an empty, writable directory) before the server starts when running several uvicorn
+# workers: every process then writes its samples to memory-mapped files there and /metrics
+# aggregates all of them, whichever worker answers the scrape. prometheus_client reads the
+# variable when it is imported, so it cannot be switched on from inside a running process.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Upper bounds (seconds) of the stage and request latency buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Upper bounds of the batch-size buckets, as in src/core/batching.py
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+STAGE_SECONDS = Histogram(
+    "evaluator_stage_seconds", "Duration of one pipeline stage call (see src/core/tracing.span)",
+    ["stage"], buckets=LATENCY_BUCKETS
+)
+REQUEST_SECONDS = Histogram(
+    "evaluator_request_seconds", "HTTP request duration, streamed responses included",
+    ["endpoint"], buckets=LATENCY_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "evaluator_requests_in_flight", "HTTP requests being handled, summed over live workers",
+    ["endpoint"], multiprocess_mode="livesum"
+)
+BATCH_FILES = Histogram(
+    "evaluator_batch_files", "Files per evaluation request or queued job", buckets=SIZE_BUCKETS
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "evaluator_embedding_batch_size", "Texts per embedding model call of the cross-request micro-batcher",
+    buckets=SIZE_BUCKETS
+)
+INGESTED_BYTES = Counter("evaluator_ingested_bytes", "Bytes of accepted uploads", ["file_type"])
+INGESTED_FILES = Counter("evaluator_ingested_files", "Accepted uploads", ["file_type"])
+CACHE_LOOKUPS = Counter(
+    "evaluator_cache_lookups", "Cache lookups by cache and outcome (hit ratio: hit / (hit + miss))",
+    ["cache", "result"]
+)
+MODEL_LOAD_SECONDS = Gauge(
+    "evaluator_model_load_seconds", "Time taken to load a shared resource (models, vector store, rules)",
+    ["resource"], multiprocess_mode="livemax"
+)
+
+# File types reported as themselves; anything else is "other", so labels stay bounded
+_KNOWN_FILE_TYPES = {"pdf", "docx", "txt"}
+
+
+def file_type(filename: str) -> str:
+    extension = os.path.splitext(filename or "")[1].lower().lstrip(".")
+    return extension if extension in _KNOWN_FILE_TYPES else "other"
+
+
+def record_upload(filename: str, size: int):
+    kind = file_type(filename)
+    INGESTED_BYTES.labels(kind).inc(size)
+    INGESTED_FILES.labels(kind).inc()
+
+
+def cache_counters(cache: str) -> tuple:
+    """(hit, miss) counters of one cache, bound once so a lookup costs a single inc()."""
+    return CACHE_LOOKUPS.labels(cache, "hit"), CACHE_LOOKUPS.labels(cache, "miss")
+
+
+def render_metrics() -> tuple:
+    """(body, content type) of a scrape: this process's metrics, or every worker's in multiprocess mode."""
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = DEFAULT_REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def mark_worker_stopped():
+    """Drops this worker's live gauges (in-flight requests, load times) from multiprocess scrapes."""
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that tracks in-flight requests and request durations per endpoint.
+    Endpoints are labelled with their route template (/jobs/{job_id}), not the raw path.
+    """
+
+    def __init__(self, app, routes: list):
+        self.app = app
+        self.routes = routes
+        self._children = {}
+
+    def _endpoint(self, scope) -> str:
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", "other")
+        return "unmatched"
+
+    def _metrics_for(self, endpoint: str) -> tuple:
+        children = self._children.get(endpoint)
+        if children is None:
+            children = self._children[endpoint] = (
+                REQUESTS_IN_FLIGHT.labels(endpoint), REQUEST_SECONDS.labels(endpoint)
+            )
+        return children
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        in_flight, duration = self._metrics_for(self._endpoint(scope))
+        started = time.perf_counter()
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            in_flight.dec()
+            duration.observe(time.perf_counter() - started)
@@ -0,0 +1,161 @@
+# src/core/registry.py
+
+import logging
+import os
+import threading
+import time
+
+from src.core.metrics import MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# --- Shared resource locations ---
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+VECTOR_DB_PATH = "vector_db"
+COLLECTION_NAME = "proposals"
+# Features + classifier in one artifact, written by train_model.py
+RISK_PIPELINE_PATH = "trained_models/risk_pipeline.joblib"
+FINANCIAL_RULES_PATH = "financial_rules.yaml"
+KNOWLEDGE_BASE_PATH = "data/processed/knowledge_base.json"
+# Novelty search backend: "chroma" (persistent HNSW collection), "numpy" (exact, memory-mapped matrix)
+# or "ivf" (the numpy store plus an approximate inverted-file index, for very large knowledge bases)
+VECTOR_BACKEND = os.getenv("EVALUATOR_VECTOR_BACKEND", "chroma")
+NUMPY_STORE_PATH = os.path.join(VECTOR_DB_PATH, f"numpy_{COLLECTION_NAME}")
+# Section/chunk-level index used for chunk novelty; numpy/ivf backends store it as float16
+CHUNK_COLLECTION_NAME = "proposal_chunks"
+NUMPY_CHUNK_STORE_PATH = os.path.join(VECTOR_DB_PATH, f"numpy_{CHUNK_COLLECTION_NAME}")
+
+
+class ResourceRegistry:
+    """
+    Process-wide registry of heavy, shareable resources (models, DB clients, rules).
+    Each resource is loaded once, on first use or during warmup(), and then shared
+    by every module that asks for it.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._resources = {}
+        self._locks = {}
+        self._load_seconds = {}
+        self._errors = {}
+
+    def register(self, name: str, loader):
+        """Registers a zero-argument loader for a named resource."""
+        self._loaders[name] = loader
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str):
+        """Returns the named resource, loading it first if needed."""
+        if name in self._resources:
+            return self._resources[name]
+        with self._locks[name]:
+            if name not in self._resources:
+                started = time.perf_counter()
+                try:
+                    self._resources[name] = self._loaders[name]()
+                except Exception as e:
+                    self._errors[name] = str(e)
+                    raise
+                self._errors.pop(name, None)
+                self._load_seconds[name] = round(time.perf_counter() - started, 3)
+                MODEL_LOAD_SECONDS.labels(name).set(self._load_seconds[name])
+                logger.info("Loaded %s in %ss", name, self._load_seconds[name])
+        return self._resources[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._resources
+
+    def warmup(self, names: list = None):
+        """Loads the given resources (all registered ones by default) ahead of the first request."""
+        for name in names or list(self._loaders):
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.warning("Warmup failed for %s: %s", name, e)
+
+    def readiness(self) -> dict:
+        """Per-resource load state, suitable for a readiness probe."""
+        resources = {
+            name: {
+                "loaded": name in self._resources,
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name)
+            }
+            for name in self._loaders
+        }
+        return {
+            "ready": all(state["loaded"] for state in resources.values()),
+            "resources": resources
+        }
+
+
+# --- Loaders: heavy libraries are imported only when the resource is first needed ---
+
+def _load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+    from src.core.embedding_cache import CachedEncoder, get_embedding_cache
+    return CachedEncoder(SentenceTransformer(EMBEDDING_MODEL_NAME), get_embedding_cache())
+
+
+def _open_vector_store(collection_name: str, numpy_path: str, dtype: str = "float32"):
+    from src.models.vector_store import ChromaVectorStore, IVFVectorStore, NumpyVectorStore
+    if VECTOR_BACKEND == "numpy":
+        return NumpyVectorStore(numpy_path, dtype=dtype)
+    if VECTOR_BACKEND == "ivf":
+        return IVFVectorStore(numpy_path, dtype=dtype)
+    if VECTOR_BACKEND != "chroma":
+        raise ValueError(f"Unknown vector backend: {VECTOR_BACKEND}")
+    import chromadb
+    client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
+    return ChromaVectorStore(client.get_or_create_collection(name=collection_name))
+
+
+def _load_proposal_collection():
+    return _open_vector_store(COLLECTION_NAME, NUMPY_STORE_PATH)
+
+
+def _load_chunk_collection():
+    return _open_vector_store(CHUNK_COLLECTION_NAME, NUMPY_CHUNK_STORE_PATH, dtype="float16")
+
+
+def _load_risk_pipeline():
+    import joblib
+    return joblib.load(RISK_PIPELINE_PATH)
+
+
+def _load_financial_rules():
+    from src.processing.financial_analyzer import load_rules
+    return load_rules(FINANCIAL_RULES_PATH)
+
+
+REGISTRY = ResourceRegistry()
+REGISTRY.register("embedding_model", _load_embedding_model)
+REGISTRY.register("proposal_collection", _load_proposal_collection)
+REGISTRY.register("chunk_collection", _load_chunk_collection)
+REGISTRY.register("risk_pipeline", _load_risk_pipeline)
+REGISTRY.register("financial_rules", _load_financial_rules)
+
+
+def get_embedding_model():
+    """Shared, cache-backed SentenceTransformer."""
+    return REGISTRY.get("embedding_model")
+
+
+def get_proposal_collection():
+    """Shared vector store (see src/models/vector_store.py) holding the knowledge-base embeddings."""
+    return REGISTRY.get("proposal_collection")
+
+
+def get_chunk_collection():
+    """Shared vector store holding knowledge-base chunk embeddings, tagged with their parent project id."""
+    return REGISTRY.get("chunk_collection")
+
+
+def get_risk_pipeline():
+    """Shared risk pipeline (TF-IDF + text length features -> classifier)."""
+    return REGISTRY.get("risk_pipeline")
+
+
+def get_financial_rules():
+    return REGISTRY.get("financial_rules")
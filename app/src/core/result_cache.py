@@ -0,0 +1,154 @@
+# src/core/result_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from src.core.executors import run_in_thread
+from src.core.metrics import cache_counters
+
+# --- Result cache configuration (overridable through environment variables) ---
+RESULT_CACHE_SIZE = int(os.getenv("EVALUATOR_RESULT_CACHE_SIZE", "256"))
+# Path of the optional on-disk tier; leave unset to keep the cache in memory only.
+RESULT_CACHE_DB = os.getenv("EVALUATOR_RESULT_CACHE_DB")
+
+
+def artifact_fingerprint(paths: list, extra: str = "") -> str:
+    """
+    Hashes the contents of the artifacts an evaluation depends on (models, knowledge base, rules).
+    Any change to one of them produces a new fingerprint and therefore new cache keys.
+    """
+    digest = hashlib.sha256(extra.encode("utf-8"))
+    for path in paths:
+        digest.update(path.encode("utf-8"))
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()[:16]
+
+
+def make_cache_key(content_sha256: str, fingerprint: str) -> str:
+    """Cache key for one upload: SHA-256 of its bytes plus the artifact fingerprint."""
+    return f"{content_sha256}:{fingerprint}"
+
+
+class ResultCache:
+    """
+    Two-tier cache of full evaluation results keyed by make_cache_key.
+    The in-memory tier is an LRU bounded to max_entries; the optional SQLite tier survives restarts.
+    name labels the cache's hit/miss counters on /metrics.
+    """
+
+    def __init__(self, max_entries: int = RESULT_CACHE_SIZE, db_path: str = RESULT_CACHE_DB, name: str = "result"):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()  # guards the in-memory tier and counters
+        self._db_lock = threading.Lock()  # serializes use of the SQLite connection
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._hit_counter, self._miss_counter = cache_counters(name)
+        if db_path:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._db.commit()
+
+    def get(self, key: str):
+        """Returns the cached result for key, or None on a miss."""
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        if self._db is not None:
+            return self._disk_get(key)
+        self._count_miss()
+        return None
+
+    async def get_async(self, key: str):
+        """
+        get() for the event loop: memory hits are answered inline, while a lookup that has
+        to read the SQLite tier runs on the I/O pool.
+        """
+        value = self._memory_get(key)
+        if value is not None:
+            return value
+        if self._db is not None:
+            return await run_in_thread(self._disk_get, key)
+        self._count_miss()
+        return None
+
+    def put(self, key: str, value: dict):
+        """Stores a result in memory and, when enabled, on disk."""
+        with self._lock:
+            self._remember(key, value)
+        if self._db is not None:
+            self._disk_put(key, value)
+
+    async def put_async(self, key: str, value: dict):
+        """put() for the event loop: the SQLite write (and its JSON encoding) runs on the I/O pool."""
+        with self._lock:
+            self._remember(key, value)
+        if self._db is not None:
+            await run_in_thread(self._disk_put, key, value)
+
+    def _memory_get(self, key: str):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            self._entries.move_to_end(key)
+            self.memory_hits += 1
+        self._hit_counter.inc()
+        return value
+
+    def _disk_get(self, key: str):
+        # The memory lock is not held here, so lookups on the event loop never wait for SQLite
+        with self._db_lock:
+            row = self._db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._count_miss()
+            return None
+        value = json.loads(row[0])
+        with self._lock:
+            self._remember(key, value)
+            self.disk_hits += 1
+        self._hit_counter.inc()
+        return value
+
+    def _disk_put(self, key: str, value: dict):
+        payload = json.dumps(value)
+        with self._db_lock:
+            self._db.execute("INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)", (key, payload))
+            self._db.commit()
+
+    def _count_miss(self):
+        with self._lock:
+            self.misses += 1
+        self._miss_counter.inc()
+
+    def _remember(self, key: str, value: dict):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "disk_tier": self._db is not None,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0
+        }
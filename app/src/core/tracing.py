@@ -0,0 +1,157 @@
+# src/core/tracing.py
+
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from urllib.parse import parse_qs
+
+from src.core.metrics import STAGE_SECONDS
+
+# --- Logging and tracing configuration (overridable through environment variables) ---
+LOG_LEVEL = os.getenv("EVALUATOR_LOG_LEVEL", "INFO").upper()
+# Trace every request (not only ?trace=true ones) and log one timing line per request
+TRACE_ALL = os.getenv("EVALUATOR_TRACE_ALL", "0") == "1"
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+logger = logging.getLogger(__name__)
+
+# Trace of the request being handled, or None. Context variables follow the request into
+# its asyncio tasks, and into thread-pool calls made through executors.run_in_thread.
+_current_trace = contextvars.ContextVar("evaluator_trace", default=None)
+
+_listener = None
+
+
+def configure_logging(level: str = LOG_LEVEL):
+    """
+    Sends all log records through a queue: the logging call only enqueues the record and a
+    QueueListener thread formats and writes it to stderr, so request handlers never block on
+    the console. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    console = logging.StreamHandler()
+    console.setFormatter(logging.Formatter(LOG_FORMAT))
+    _listener = QueueListener(log_queue, console, respect_handler_level=True)
+    _listener.start()
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Writes out queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class Trace:
+    """Spans recorded while handling one request: (stage, start offset ms, duration ms)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.spans = []
+
+    def summary(self) -> dict:
+        """Per-stage totals plus the individual spans, for a response's "trace" field."""
+        stages = {}
+        for stage, _, duration_ms in self.spans:
+            totals = stages.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            totals["count"] += 1
+            totals["total_ms"] += duration_ms
+            totals["max_ms"] = max(totals["max_ms"], duration_ms)
+        for totals in stages.values():
+            totals["total_ms"] = round(totals["total_ms"], 3)
+            totals["max_ms"] = round(totals["max_ms"], 3)
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "stages": stages,
+            "spans": [
+                {"stage": stage, "start_ms": round(start_ms, 3), "duration_ms": round(duration_ms, 3)}
+                for stage, start_ms, duration_ms in self.spans
+            ]
+        }
+
+
+# Histogram child per stage, so a span does not resolve its label on every exit
+_stage_histograms = {}
+
+
+class _Span:
+    __slots__ = ("trace", "histogram", "stage", "started")
+
+    def __init__(self, trace, stage: str):
+        self.trace = trace
+        self.stage = stage
+        self.histogram = _stage_histograms.get(stage)
+        if self.histogram is None:
+            self.histogram = _stage_histograms.setdefault(stage, STAGE_SECONDS.labels(stage))
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        ended = time.perf_counter()
+        self.histogram.observe(ended - self.started)
+        if self.trace is not None:
+            # list.append is atomic, so spans from worker threads can be added concurrently
+            self.trace.spans.append((
+                self.stage, (self.started - self.trace.started) * 1000, (ended - self.started) * 1000
+            ))
+        return False
+
+
+def span(stage: str):
+    """
+    Times a block as one call of a pipeline stage ("parse", "section", "embed", "vector_query",
+    "risk", "financial", ...): always into the evaluator_stage_seconds histogram of /metrics,
+    and as a span of the current request's trace when the request is traced.
+    """
+    return _Span(_current_trace.get(), stage)
+
+
+def current_trace():
+    """The current request's Trace, or None when the request is not traced."""
+    return _current_trace.get()
+
+
+def _trace_requested(scope: dict) -> bool:
+    values = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("trace", [])
+    return any(value.lower() in ("1", "true", "yes") for value in values)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that traces requests made with ?trace=true (or every request with
+    EVALUATOR_TRACE_ALL=1). Endpoints add current_trace().summary() to their response;
+    with EVALUATOR_TRACE_ALL the per-stage totals are also logged.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (TRACE_ALL or _trace_requested(scope)):
+            await self.app(scope, receive, send)
+            return
+        trace = Trace(f"{scope['method']} {scope['path']}")
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_trace.reset(token)
+            if TRACE_ALL:
+                stages = trace.summary()["stages"]
+                logger.info("%s %.1f ms %s", trace.name, (time.perf_counter() - trace.started) * 1000,
+                            " ".join(f"{stage}={totals['total_ms']}ms" for stage, totals in stages.items()))
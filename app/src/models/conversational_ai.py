@@ -1,29 +1,43 @@
 # src/models/conversational_ai.py
 
-from langchain_community.vectorstores import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
+from typing import Any
+
 from langchain.docstore.document import Document
 from langchain_community.chat_models import ChatOllama
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
 from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.retrievers import BaseRetriever
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-import os
 
-from src.processing.document_parser import extract_sections
+from src.models.document_index import RETRIEVER_K, get_document_index_for_file
+from src.models.document_qa import QA_PROMPT
+from src.models.llm_backends import LLM_MODEL, OLLAMA_HOST
+
+
+class DocumentIndexRetriever(BaseRetriever):
+    """LangChain retriever over a cached DocumentIndex (see src/models/document_index.py)."""
+
+    index: Any
+    k: int = RETRIEVER_K
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list:
+        return [
+            Document(page_content=passage.text, metadata={"section": passage.section, "similarity": passage.similarity})
+            for passage in self.index.search(query, self.k)
+        ]
+
 
 def create_retriever_for_document(file_path: str):
-    # ... (This function is the same as before, so it's omitted for brevity) ...
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            document_text = f.read()
-    except FileNotFoundError:
+    """
+    Retriever over one proposal's section chunks. The index is built once per file content
+    (keyed by its hash, LRU-evicted across documents) with the shared embedding model, so
+    follow-up questions about the same proposal only pay for embedding the question.
+    """
+    index = get_document_index_for_file(file_path)
+    if index is None:
         return None
-    sections = extract_sections(document_text)
-    chunks = [Document(page_content=content, metadata={"section": header}) for header, content in sections.items()]
-    embedding_function = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-    vectorstore = Chroma.from_documents(documents=chunks, embedding=embedding_function)
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 2})
-    return retriever
+    return DocumentIndexRetriever(index=index)
 
 # --- Main block for running the full RAG pipeline ---
 if __name__ == '__main__':
@@ -34,21 +48,10 @@ if __name__ == '__main__':
     
     if retriever:
         # Step 2: Define the LLM and the Prompt Template
-        llm = ChatOllama(model="tinyllama")
-        
-        prompt_template = """
-        You are an expert assistant for reviewing research proposals.
-        Answer the user's question based ONLY on the following context.
-        If the information is not in the context, say "I cannot find that information in the document."
-
-        Context:
-        {context}
-
-        Question:
-        {question}
-        """
+        # Same model, server and prompt as the /proposals/{id}/ask endpoint
+        llm = ChatOllama(model=LLM_MODEL, base_url=OLLAMA_HOST)
         
-        prompt = ChatPromptTemplate.from_template(prompt_template)
+        prompt = ChatPromptTemplate.from_template(QA_PROMPT)
 
         # Step 3: Create the RAG Chain
         # This chains together the retriever, prompt, LLM, and output parser.
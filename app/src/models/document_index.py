@@ -0,0 +1,150 @@
+# src/models/document_index.py
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+import numpy as np
+
+from src.core.metrics import cache_counters
+from src.core.registry import get_embedding_model
+from src.models.vector_store import _normalize_rows, _top_k
+from src.processing.chunker import chunk_sections
+from src.processing.document_parser import extract_sections
+
+# Documents whose retrieval index stays in memory; the least recently used one is dropped first
+DOCUMENT_INDEX_CACHE_SIZE = int(os.getenv("EVALUATOR_DOCUMENT_INDEX_CACHE_SIZE", "32"))
+# Passages handed to the LLM per question
+RETRIEVER_K = 2
+
+
+class Passage(NamedTuple):
+    """One retrieved chunk of a document."""
+    section: str
+    text: str
+    similarity: float
+
+
+class DocumentIndex:
+    """
+    Retrieval index of one document: its section chunks (see chunk_sections) and their
+    L2-normalized embeddings in one (n, dim) matrix. Built once per document; a question
+    then costs one query embedding and one matrix-vector product.
+    """
+
+    def __init__(self, chunks: list, matrix: np.ndarray):
+        self.chunks = chunks
+        self.matrix = matrix
+
+    @classmethod
+    def build(cls, sections: dict, encoder=None):
+        """Chunks a section dict (as returned by extract_sections) and embeds every chunk in one batched call."""
+        chunks = chunk_sections(sections)
+        if not chunks:
+            return cls([], np.zeros((0, 0), dtype=np.float32))
+        encoder = encoder or get_embedding_model()
+        embeddings = encoder.encode([chunk for _, chunk in chunks])
+        return cls(chunks, _normalize_rows(np.asarray(embeddings, dtype=np.float32)))
+
+    def search_embedding(self, query_embedding, k: int = RETRIEVER_K) -> list:
+        """The k passages most similar to an already-embedded query, best first."""
+        k = min(k, len(self.chunks))
+        if k == 0:
+            return []
+        query = _normalize_rows(np.atleast_2d(np.asarray(query_embedding, dtype=np.float32)))
+        top, top_similarities = _top_k(query @ self.matrix.T, k)
+        return [
+            Passage(self.chunks[row][0], self.chunks[row][1], round(float(similarity), 4))
+            for row, similarity in zip(top[0].tolist(), top_similarities[0].tolist())
+        ]
+
+    def search(self, query: str, k: int = RETRIEVER_K, encoder=None) -> list:
+        """The k passages most similar to query, best first."""
+        if not self.chunks:
+            return []
+        encoder = encoder or get_embedding_model()
+        return self.search_embedding(encoder.encode([query])[0], k)
+
+
+class DocumentIndexCache:
+    """
+    LRU of DocumentIndex objects keyed by the SHA-256 of the document's bytes. Concurrent
+    requests for the same missing document wait for one build instead of embedding it twice.
+    """
+
+    def __init__(self, max_entries: int = DOCUMENT_INDEX_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._building = {}  # key -> lock held while that document is being indexed
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter, self._miss_counter = cache_counters("document_index")
+
+    def _lookup(self, key: str):
+        index = self._entries.get(key)
+        if index is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            self._hit_counter.inc()
+        return index
+
+    def get(self, key: str, sections_loader) -> DocumentIndex:
+        """Cached index for key; on a miss, builds it from sections_loader() (a zero-argument callable)."""
+        with self._lock:
+            index = self._lookup(key)
+            if index is not None:
+                return index
+            building = self._building.setdefault(key, threading.Lock())
+        with building:
+            try:
+                with self._lock:
+                    index = self._lookup(key)
+                if index is not None:
+                    return index
+                index = DocumentIndex.build(sections_loader())
+                with self._lock:
+                    self.misses += 1
+                    self._miss_counter.inc()
+                    self._entries[key] = index
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            finally:
+                # Dropped however the build ends, so a failing document does not leave its lock behind
+                with self._lock:
+                    if self._building.get(key) is building:
+                        del self._building[key]
+        return index
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0
+        }
+
+
+DOCUMENT_INDEXES = DocumentIndexCache()
+
+
+def get_document_index(content_sha256: str, sections_loader) -> DocumentIndex:
+    """Shared per-document index, built from sections_loader() the first time these bytes are seen."""
+    return DOCUMENT_INDEXES.get(content_sha256, sections_loader)
+
+
+def get_document_index_for_file(file_path: str) -> DocumentIndex:
+    """Index of a UTF-8 text file, keyed by the hash of its bytes; None if it does not exist."""
+    try:
+        with open(file_path, "rb") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    return get_document_index(
+        hashlib.sha256(content).hexdigest(), lambda: extract_sections(content.decode("utf-8"))
+    )
@@ -0,0 +1,154 @@
+# src/models/document_qa.py
+
+import asyncio
+import os
+import time
+from contextlib import aclosing, asynccontextmanager
+
+from src.core.batching import _bucket_label
+
+# --- Document Q&A configuration (overridable through environment variables) ---
+# Answers generated at the same time; further questions wait for a free slot
+LLM_MAX_CONCURRENT = int(os.getenv("EVALUATOR_LLM_MAX_CONCURRENT", "2"))
+# Questions allowed to wait for a slot; beyond that /ask turns new questions away (503)
+LLM_MAX_WAITING = int(os.getenv("EVALUATOR_LLM_MAX_WAITING", "16"))
+# Retrieved passages cached per (proposal, normalized question)
+RETRIEVAL_CACHE_SIZE = int(os.getenv("EVALUATOR_RETRIEVAL_CACHE_SIZE", "512"))
+
+# Upper bounds of the time-to-first-token histogram buckets
+TTFT_MS_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+QA_PROMPT = """
+You are an expert assistant for reviewing research proposals.
+Answer the user's question based ONLY on the following context.
+If the information is not in the context, say "I cannot find that information in the document."
+
+Context:
+{context}
+
+Question:
+{question}
+"""
+
+
+def normalize_question(question: str) -> str:
+    """Case- and whitespace-insensitive form of a question, used as the retrieval cache key."""
+    return " ".join(question.lower().split())
+
+
+def build_prompt(question: str, passages: list) -> str:
+    """QA_PROMPT filled with the retrieved passages (dicts with "section" and "text"), best first."""
+    context = "\n\n".join(f"[{passage['section']}] {passage['text']}" for passage in passages)
+    return QA_PROMPT.format(context=context, question=question)
+
+
+class GenerationBusy(RuntimeError):
+    """Raised by GenerationLimiter.slot() when every slot and waiting place is taken."""
+
+
+class GenerationLimiter:
+    """
+    Bounds concurrent LLM generations. At most max_concurrent run at once and at most
+    max_waiting more may wait; beyond that slot() raises GenerationBusy. full() lets the
+    endpoint answer 503 before it starts streaming.
+    """
+
+    def __init__(self, max_concurrent: int = LLM_MAX_CONCURRENT, max_waiting: int = LLM_MAX_WAITING):
+        self.max_concurrent = max_concurrent
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = None
+        self._loop = None
+
+    def full(self) -> bool:
+        return self.active >= self.max_concurrent and self.waiting >= self.max_waiting
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one generation slot for the duration of the block."""
+        if self.full():
+            raise GenerationBusy("Too many questions in progress, retry shortly")
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # A semaphore belongs to one event loop (the server's, or a test client's)
+            self._loop, self._semaphore = loop, asyncio.Semaphore(self.max_concurrent)
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+
+class AskMetrics:
+    """Counters and the time-to-first-token histogram of /proposals/{id}/ask."""
+
+    def __init__(self):
+        self.questions = 0
+        self.retrieval_cache_hits = 0
+        self.answers = 0
+        self.failures = 0
+        self.rejected = 0
+        self.tokens = 0
+        self.ttft_ms_histogram = {_bucket_label(b, TTFT_MS_BUCKETS): 0 for b in TTFT_MS_BUCKETS}
+        self.ttft_ms_histogram[f">{TTFT_MS_BUCKETS[-1]}"] = 0
+        self.total_ttft_ms = 0.0
+        self.max_ttft_ms = 0.0
+        self.first_tokens = 0
+
+    def record_first_token(self, ttft_ms: float):
+        self.first_tokens += 1
+        self.total_ttft_ms += ttft_ms
+        self.max_ttft_ms = max(self.max_ttft_ms, ttft_ms)
+        self.ttft_ms_histogram[_bucket_label(ttft_ms, TTFT_MS_BUCKETS)] += 1
+
+    def stats(self) -> dict:
+        return {
+            "questions": self.questions,
+            "retrieval_cache_hits": self.retrieval_cache_hits,
+            "answers": self.answers,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "tokens_streamed": self.tokens,
+            "ttft_ms_histogram": self.ttft_ms_histogram,
+            "average_ttft_ms": round(self.total_ttft_ms / self.first_tokens, 3) if self.first_tokens else 0,
+            "max_ttft_ms": round(self.max_ttft_ms, 3)
+        }
+
+
+async def stream_answer(backend, prompt: str, limiter: GenerationLimiter, metrics: AskMetrics, started: float):
+    """
+    Generates an answer within a limiter slot and yields ("token", text) for every piece,
+    then ("done", timings). started is the request's time.perf_counter(), so the reported
+    time to first token includes retrieval and waiting for a slot.
+    """
+    ttft_ms, tokens = None, 0
+    async with limiter.slot():
+        generation_started = time.perf_counter()
+        try:
+            # Closing this generator early (client gone) also closes the backend's stream
+            async with aclosing(backend.stream(prompt)) as pieces:
+                async for piece in pieces:
+                    if ttft_ms is None:
+                        ttft_ms = (time.perf_counter() - started) * 1000
+                        metrics.record_first_token(ttft_ms)
+                    tokens += 1
+                    metrics.tokens += 1
+                    yield "token", piece
+        except Exception:
+            metrics.failures += 1
+            raise
+    metrics.answers += 1
+    yield "done", {
+        "ttft_ms": round(ttft_ms, 3) if ttft_ms is not None else None,
+        "generation_ms": round((time.perf_counter() - generation_started) * 1000, 3),
+        "total_ms": round((time.perf_counter() - started) * 1000, 3),
+        "tokens": tokens,
+        "backend": backend.name
+    }
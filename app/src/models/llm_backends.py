@@ -0,0 +1,95 @@
+# src/models/llm_backends.py
+
+import asyncio
+import os
+import re
+import threading
+
+# --- LLM configuration (overridable through environment variables) ---
+# "ollama" (a local Ollama server) or "stub" (deterministic extractive answers, no model needed)
+LLM_BACKEND = os.getenv("EVALUATOR_LLM_BACKEND", "ollama").lower()
+LLM_MODEL = os.getenv("EVALUATOR_LLM_MODEL", "tinyllama")
+OLLAMA_HOST = os.getenv("EVALUATOR_OLLAMA_HOST", "http://localhost:11434")
+# Delay between the stub's tokens, to exercise streaming clients without a model
+STUB_TOKEN_DELAY_MS = float(os.getenv("EVALUATOR_LLM_STUB_DELAY_MS", "0"))
+
+NO_ANSWER = "I cannot find that information in the document."
+
+
+class LLMBackend:
+    """
+    Interface of the answer generators behind /proposals/{id}/ask.
+    stream() is an async generator that yields the answer's text pieces as they are produced.
+    """
+
+    name = "base"
+
+    def stream(self, prompt: str):
+        raise NotImplementedError
+
+
+class OllamaBackend(LLMBackend):
+    """Streams completions from an Ollama server (the model used by the RAG chain in conversational_ai)."""
+
+    name = "ollama"
+
+    def __init__(self, model: str = LLM_MODEL, host: str = OLLAMA_HOST):
+        self.model = model
+        self.host = host
+        self._client = None
+
+    async def stream(self, prompt: str):
+        if self._client is None:
+            from ollama import AsyncClient
+            self._client = AsyncClient(host=self.host)
+        async for chunk in await self._client.generate(model=self.model, prompt=prompt, stream=True):
+            if chunk["response"]:
+                yield chunk["response"]
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic stand-in for tests and demos: answers with the first sentence of the
+    prompt's context, one word at a time, or NO_ANSWER when the context is empty.
+    """
+
+    name = "stub"
+
+    def __init__(self, token_delay_ms: float = STUB_TOKEN_DELAY_MS):
+        self.token_delay_ms = token_delay_ms
+
+    @staticmethod
+    def answer(prompt: str) -> str:
+        context = prompt.partition("Context:")[2].partition("Question:")[0]
+        context = " ".join(re.sub(r"^\[[^\]]*\]", "", context.strip()).split())
+        if not context:
+            return NO_ANSWER
+        return re.split(r"(?<=[.!?])\s", context, maxsplit=1)[0]
+
+    async def stream(self, prompt: str):
+        words = self.answer(prompt).split(" ")
+        for n, word in enumerate(words):
+            if self.token_delay_ms:
+                await asyncio.sleep(self.token_delay_ms / 1000)
+            yield word if n == len(words) - 1 else word + " "
+
+
+def create_llm_backend(name: str = LLM_BACKEND) -> LLMBackend:
+    if name == "ollama":
+        return OllamaBackend()
+    if name == "stub":
+        return StubBackend()
+    raise ValueError(f"Unknown LLM backend: {name}")
+
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_llm_backend() -> LLMBackend:
+    """Returns the process-wide LLM backend selected by EVALUATOR_LLM_BACKEND."""
+    global _shared_backend
+    with _shared_backend_lock:
+        if _shared_backend is None:
+            _shared_backend = create_llm_backend()
+        return _shared_backend
@@ -1,56 +1,162 @@
 # src/models/novelty_analyzer.py
 
-import chromadb
 import os
+import logging
 import json
-from sentence_transformers import SentenceTransformer
+import hashlib
 
-# --- Load the model ONCE when the file is imported ---
-embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
+from src.core.registry import (
+    get_embedding_model, get_proposal_collection, get_chunk_collection, KNOWLEDGE_BASE_PATH,
+    VECTOR_DB_PATH, VECTOR_BACKEND
+)
+from src.processing.chunker import chunk_sections, chunk_text, CHUNK_MAX_WORDS, CHUNK_OVERLAP_WORDS
 
-# --- Database Setup ---
-DB_PATH = "vector_db"
-client = chromadb.PersistentClient(path=DB_PATH)
-collection = client.get_or_create_collection(name="proposals")
+logger = logging.getLogger(__name__)
 
+# Number of texts the embedding model encodes per forward pass in batched calls
+EMBEDDING_BATCH_SIZE = int(os.getenv("EVALUATOR_EMBEDDING_BATCH_SIZE", "32"))
+# Projects embedded and written per knowledge-base sync step
+KB_SYNC_CHUNK_SIZE = int(os.getenv("EVALUATOR_KB_SYNC_CHUNK_SIZE", "256"))
+KB_SYNC_CHECKPOINT_PATH = os.path.join(VECTOR_DB_PATH, f"kb_sync_{VECTOR_BACKEND}.json")
+# "chunk" compares section chunks against the chunk index; "document" embeds the whole text at once
+NOVELTY_MODE = os.getenv("EVALUATOR_NOVELTY_MODE", "chunk").lower()
+# Nearest knowledge-base chunks retrieved per proposal chunk before aggregating per project
+CHUNK_QUERY_RESULTS = int(os.getenv("EVALUATOR_CHUNK_QUERY_RESULTS", "20"))
 
-def embed_knowledge_base():
-    # ... (This function remains the same, but no longer loads the model) ...
-    if collection.count() > 0:
-        print("Knowledge base is already embedded.")
-        return
+
+def _content_hash(*parts: str) -> str:
+    """Fingerprint of everything stored for an entry, so edited projects are re-embedded."""
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _read_checkpoint(path: str) -> dict:
     try:
-        with open('data/processed/knowledge_base.json', 'r', encoding='utf-8') as f:
-            knowledge_base = json.load(f)
-    except FileNotFoundError:
-        print("Error: knowledge_base.json not found.")
-        return
-    documents_to_embed = [project['full_text'] for project in knowledge_base]
-    metadatas_to_store = [{"title": p['project_title']} for p in knowledge_base]
-    ids_to_store = [project['project_id'] for project in knowledge_base]
-    embeddings = embedding_model.encode(documents_to_embed).tolist()
-    collection.add(embeddings=embeddings, documents=documents_to_embed, metadatas=metadatas_to_store, ids=ids_to_store)
-    print("Successfully embedded and stored the knowledge base.")
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
 
 
-# src/models/novelty_analyzer.py
+def _write_checkpoint(path: str, checkpoint: dict):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(path + ".tmp", path)
 
-def calculate_novelty(new_proposal_text: str, embedding_model, collection, n_results: int = 3) -> dict:
+
+def _project_entries(knowledge_base: list) -> dict:
+    """Whole-document entries: project id -> (text, metadata)."""
+    return {
+        project['project_id']: (project['full_text'], {
+            "title": project['project_title'],
+            "content_hash": _content_hash(project['project_title'], project['full_text'])
+        })
+        for project in knowledge_base
+    }
+
+
+def _chunk_entries(knowledge_base: list) -> dict:
+    """Chunk entries tagged with their parent project: "<project id>#<n>" -> (text, metadata)."""
+    entries = {}
+    for project in knowledge_base:
+        for n, (section, text) in enumerate(chunk_text(project['full_text'])):
+            entries[f"{project['project_id']}#{n}"] = (text, {
+                "project_id": project['project_id'],
+                "title": project['project_title'],
+                "section": section,
+                "content_hash": _content_hash(project['project_title'], section, text)
+            })
+    return entries
+
+
+def _sync_entries(label: str, entries: dict, source_sha256: str, embedding_model, collection,
+                  chunk_size: int, checkpoint_path: str) -> dict:
     """
-    Calculates novelty by receiving a pre-loaded model and db collection.
-    Returns maximum similarity percentage - higher similarity = red flag, lower = unique
+    Makes the store hold exactly `entries` (id -> (text, metadata with content_hash)).
+    Stored ids and content hashes are diffed against them: only new or changed entries are
+    embedded, chunk_size at a time, and entries that disappeared are deleted. Every step is
+    committed on its own, so an interrupted sync resumes where it stopped. The checkpoint file
+    records progress and lets an unchanged source be skipped without reading the store.
     """
-    new_embedding = embedding_model.encode(new_proposal_text).tolist()
-    
-    results = collection.query(
-        query_embeddings=[new_embedding],
-        n_results=n_results
-    )
-    
-    distances = results['distances'][0]
-    metadatas = results['metadatas'][0]
-    ids = results['ids'][0]
-    
+    checkpoint = _read_checkpoint(checkpoint_path) if checkpoint_path else {}
+    if checkpoint.get("source_sha256") == source_sha256:
+        if checkpoint.get("status") == "complete" and collection.count() == len(entries):
+            logger.info("Knowledge base %s are already embedded.", label)
+            return {"added": 0, "updated": 0, "deleted": 0, "unchanged": len(entries)}
+        if checkpoint.get("status") == "in_progress":
+            logger.info("Resuming knowledge-base %s sync (%s/%s done).", label, checkpoint["synced"], checkpoint["total"])
+
+    stored = collection.get(include=["metadatas"])
+    stored_hashes = {id_: (metadata or {}).get("content_hash") for id_, metadata in zip(stored["ids"], stored["metadatas"])}
+    pending = [id_ for id_, (_, metadata) in entries.items() if stored_hashes.get(id_) != metadata["content_hash"]]
+    stale = [id_ for id_ in stored_hashes if id_ not in entries]
+    counts = {
+        "added": sum(1 for id_ in pending if id_ not in stored_hashes),
+        "updated": sum(1 for id_ in pending if id_ in stored_hashes),
+        "deleted": len(stale),
+        "unchanged": len(entries) - len(pending)
+    }
+
+    for start in range(0, len(stale), chunk_size):
+        collection.delete(ids=stale[start:start + chunk_size])
+
+    checkpoint = {"source_sha256": source_sha256, "status": "in_progress", "total": len(pending), "synced": 0}
+    for start in range(0, len(pending), chunk_size):
+        ids = pending[start:start + chunk_size]
+        documents = [entries[id_][0] for id_ in ids]
+        embeddings = embedding_model.encode(documents, batch_size=EMBEDDING_BATCH_SIZE).tolist()
+        collection.upsert(ids=ids, embeddings=embeddings, metadatas=[entries[id_][1] for id_ in ids], documents=documents)
+        if hasattr(embedding_model, "cache"):
+            embedding_model.cache.flush()
+        checkpoint["synced"] += len(ids)
+        if checkpoint_path:
+            _write_checkpoint(checkpoint_path, checkpoint)
+
+    if checkpoint_path:
+        _write_checkpoint(checkpoint_path, dict(checkpoint, status="complete"))
+    logger.info("Knowledge base %s synced: %d added, %d updated, %d deleted, %d unchanged.",
+                label, counts["added"], counts["updated"], counts["deleted"], counts["unchanged"])
+    return counts
+
+
+def embed_knowledge_base(embedding_model=None, collection=None, chunk_collection=None,
+                         chunk_size: int = KB_SYNC_CHUNK_SIZE, checkpoint_path: str = None) -> dict:
+    """
+    Incrementally syncs knowledge_base.json into the project store and the chunk store.
+    With no stores given, the shared registry stores are synced and checkpointed under vector_db/;
+    with an explicit collection, chunks are only synced if chunk_collection is given too.
+    Returns {"projects": counts, "chunks": counts} with added/updated/deleted/unchanged entries.
+    """
+    if collection is None:
+        collection = get_proposal_collection()
+        chunk_collection = chunk_collection or get_chunk_collection()
+        checkpoint_path = checkpoint_path or KB_SYNC_CHECKPOINT_PATH
+    embedding_model = embedding_model or get_embedding_model()
+    try:
+        with open(KNOWLEDGE_BASE_PATH, 'rb') as f:
+            raw = f.read()
+    except FileNotFoundError:
+        logger.error("Error: knowledge_base.json not found.")
+        return {}
+    knowledge_base = json.loads(raw)
+    kb_sha256 = hashlib.sha256(raw).hexdigest()
+
+    counts = {"projects": _sync_entries("projects", _project_entries(knowledge_base), kb_sha256,
+                                        embedding_model, collection, chunk_size, checkpoint_path)}
+    if chunk_collection is not None:
+        # Chunk ids and texts depend on the chunking settings as well as on the knowledge base
+        chunk_source = _content_hash(kb_sha256, str(CHUNK_MAX_WORDS), str(CHUNK_OVERLAP_WORDS))
+        chunk_checkpoint = checkpoint_path and checkpoint_path.replace(".json", "_chunks.json")
+        counts["chunks"] = _sync_entries("chunks", _chunk_entries(knowledge_base), chunk_source,
+                                         embedding_model, chunk_collection, chunk_size, chunk_checkpoint)
+    return counts
+
+
+# src/models/novelty_analyzer.py
+
+def _build_novelty_result(distances: list, metadatas: list, ids: list) -> dict:
+    """Turns one query's distances/metadatas/ids into the novelty report returned by the API."""
     # Convert distance to similarity percentage (lower distance = higher similarity)
     # Distance 0 = 100% similarity, Distance 1 = 0% similarity
     max_similarity = max(0, min(95, int((1 - distances[0]) * 100))) if distances else 50
@@ -74,4 +180,137 @@ def calculate_novelty(new_proposal_text: str, embedding_model, collection, n_res
         "similar_projects": [
             {"id": ids[i], "title": metadatas[i]['title'], "similarity": int((1 - distances[i]) * 100)} for i in range(len(ids))
         ]
-    }
\ No newline at end of file
+    }
+
+
+def calculate_novelty(new_proposal_text: str, embedding_model, collection, n_results: int = 3) -> dict:
+    """
+    Calculates novelty by receiving a pre-loaded model and db collection.
+    Returns maximum similarity percentage - higher similarity = red flag, lower = unique
+    """
+    new_embedding = embedding_model.encode(new_proposal_text).tolist()
+    
+    results = collection.query(
+        query_embeddings=[new_embedding],
+        n_results=n_results
+    )
+    
+    return _build_novelty_result(results['distances'][0], results['metadatas'][0], results['ids'][0])
+
+
+def calculate_novelty_batch(proposal_texts: list, embedding_model, collection, n_results: int = 3,
+                            batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    """
+    Batched version of calculate_novelty for multi-file uploads.
+    Encodes every text in a single model call and sends all vectors in one collection query.
+    Returns one novelty report per input text, in input order.
+    """
+    if not proposal_texts:
+        return []
+    
+    new_embeddings = embedding_model.encode(list(proposal_texts), batch_size=batch_size).tolist()
+    return query_novelty_batch(new_embeddings, collection, n_results)
+
+
+def query_novelty_batch(embeddings: list, collection, n_results: int = 3) -> list:
+    """
+    Novelty reports for already-computed embeddings (e.g. from the micro-batcher),
+    using a single multi-vector collection query.
+    """
+    if not embeddings:
+        return []
+    
+    results = collection.query(
+        query_embeddings=embeddings,
+        n_results=n_results
+    )
+    
+    return [
+        _build_novelty_result(results['distances'][k], results['metadatas'][k], results['ids'][k])
+        for k in range(len(embeddings))
+    ]
+
+
+
+def _aggregate_chunk_hits(distances: list, metadatas: list, n_results: int) -> dict:
+    """
+    Folds the chunk hits of one proposal (one hit list per proposal chunk) into a per-project report.
+    For every project, each proposal chunk counts its closest chunk of that project. The project's
+    similarity is the best of those (the same 1 - distance scale as whole-document novelty, so
+    max_similarity_percentage keeps its meaning); mean_similarity averages them over all proposal
+    chunks, counting 0 where the project was not among a chunk's hits.
+    """
+    best = {}
+    titles = {}
+    for q, (chunk_distances, chunk_metadatas) in enumerate(zip(distances, metadatas)):
+        for distance, metadata in zip(chunk_distances, chunk_metadatas):
+            project_id = metadata['project_id']
+            titles[project_id] = metadata['title']
+            per_chunk = best.setdefault(project_id, {})
+            per_chunk[q] = min(distance, per_chunk.get(q, distance))
+
+    ranked = sorted(best, key=lambda project_id: min(best[project_id].values()))[:n_results]
+    report = _build_novelty_result(
+        [min(best[project_id].values()) for project_id in ranked],
+        [{"title": titles[project_id]} for project_id in ranked],
+        ranked
+    )
+    for project, project_id in zip(report["similar_projects"], ranked):
+        similarities = [max(0.0, 1 - distance) for distance in best[project_id].values()]
+        project["mean_similarity"] = int(sum(similarities) / len(distances) * 100)
+        project["matched_chunks"] = len(similarities)
+    report["novelty_level"] = "chunk"
+    return report
+
+
+def query_chunk_novelty_batch(chunk_embeddings: list, chunk_collection, n_results: int = 3,
+                              n_chunk_results: int = CHUNK_QUERY_RESULTS) -> list:
+    """
+    Chunk-level novelty reports for already-computed embeddings. chunk_embeddings holds, per proposal,
+    the list of its chunk vectors; every chunk of every proposal goes into a single store query.
+    """
+    flat = [embedding for chunks in chunk_embeddings for embedding in chunks]
+    if not flat:
+        return [_build_novelty_result([], [], []) for _ in chunk_embeddings]
+
+    results = chunk_collection.query(
+        query_embeddings=flat,
+        n_results=n_chunk_results
+    )
+
+    reports = []
+    offset = 0
+    for chunks in chunk_embeddings:
+        rows = range(offset, offset + len(chunks))
+        offset += len(chunks)
+        if not chunks:
+            reports.append(_build_novelty_result([], [], []))
+            continue
+        reports.append(_aggregate_chunk_hits(
+            [results['distances'][row] for row in rows], [results['metadatas'][row] for row in rows], n_results
+        ))
+    return reports
+
+
+def calculate_chunk_novelty_batch(section_dicts: list, embedding_model, chunk_collection, n_results: int = 3,
+                                  batch_size: int = EMBEDDING_BATCH_SIZE) -> list:
+    """
+    Chunk-level counterpart of calculate_novelty_batch, for documents already split by extract_sections.
+    All chunks of all documents are encoded in one model call.
+    """
+    chunks = [[text for _, text in chunk_sections(sections)] for sections in section_dicts]
+    flat = [text for texts in chunks for text in texts]
+    embeddings = embedding_model.encode(flat, batch_size=batch_size).tolist() if flat else []
+    per_document = []
+    offset = 0
+    for texts in chunks:
+        per_document.append(embeddings[offset:offset + len(texts)])
+        offset += len(texts)
+    return query_chunk_novelty_batch(per_document, chunk_collection, n_results)
+
+if __name__ == "__main__":
+    # Sync the configured vector store (EVALUATOR_VECTOR_BACKEND) with the knowledge base, from the repository root:
+    #     PYTHONPATH=app python -m src.models.novelty_analyzer
+    from src.core.tracing import configure_logging
+    configure_logging()
+    embed_knowledge_base()
@@ -0,0 +1,51 @@
+# src/models/risk_features.py
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import FeatureUnion, Pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+# Serialized by train_model.py and loaded by the API, so training and serving share one feature pipeline
+RISK_TFIDF_MAX_FEATURES = 500
+# Hashed feature space of the streaming (out-of-core) pipeline; needs no vocabulary pass
+RISK_HASHING_FEATURES = 2 ** 18
+
+
+def text_length(texts) -> sp.csr_matrix:
+    """
+    Word count of every text in thousands, as a sparse (n, 1) column. Raw counts would dwarf the
+    TF-IDF weights (all <= 1) and let length alone decide the prediction.
+    """
+    return sp.csr_matrix(np.array([len(text.split()) / 1000 for text in texts], dtype=np.float64).reshape(-1, 1))
+
+
+def build_risk_pipeline(max_iter: int = 1000) -> Pipeline:
+    """
+    Raw text -> [500 TF-IDF columns | text_length] -> LogisticRegression.
+    Every step accepts and returns scipy sparse matrices, so nothing is densified.
+    """
+    features = FeatureUnion([
+        ("tfidf", TfidfVectorizer(max_features=RISK_TFIDF_MAX_FEATURES, stop_words='english', ngram_range=(1, 2))),
+        ("text_length", FunctionTransformer(text_length, accept_sparse=True, validate=False))
+    ])
+    return Pipeline([
+        ("features", features),
+        ("classifier", LogisticRegression(max_iter=max_iter))
+    ])
+
+
+def build_streaming_risk_pipeline(n_features: int = RISK_HASHING_FEATURES, random_state: int = 42) -> Pipeline:
+    """
+    Out-of-core variant: [stateless hashed, L2-normalized TF n-grams | text_length] -> SGDClassifier
+    with log loss, so it can be trained chunk by chunk with partial_fit and still serves predict_proba.
+    """
+    features = FeatureUnion([
+        ("hashing", HashingVectorizer(n_features=n_features, alternate_sign=False, stop_words='english', ngram_range=(1, 2))),
+        ("text_length", FunctionTransformer(text_length, accept_sparse=True, validate=False))
+    ])
+    return Pipeline([
+        ("features", features),
+        ("classifier", SGDClassifier(loss="log_loss", random_state=random_state))
+    ])
@@ -0,0 +1,396 @@
+# src/models/vector_store.py
+
+import json
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# --- IVF index configuration (overridable through environment variables) ---
+# Number of k-means clusters; 0 picks sqrt(n) for n indexed vectors
+IVF_NLIST = int(os.getenv("EVALUATOR_IVF_NLIST", "0"))
+# Clusters scanned per query: higher is slower but closer to exact search
+IVF_NPROBE = int(os.getenv("EVALUATOR_IVF_NPROBE", "8"))
+# Below this many vectors the IVF backend answers with exact search
+IVF_MIN_VECTORS = int(os.getenv("EVALUATOR_IVF_MIN_VECTORS", "10000"))
+IVF_TRAIN_ITERATIONS = int(os.getenv("EVALUATOR_IVF_TRAIN_ITERATIONS", "15"))
+# k-means is trained on at most this many sampled vectors per cluster
+IVF_TRAIN_SAMPLES_PER_LIST = 64
+_BLOCK_ROWS = 65536
+
+
+class VectorStore:
+    """
+    Interface of the novelty backends. It mirrors the subset of the Chroma collection API
+    the pipeline uses, so calculate_novelty and embed_knowledge_base work with any backend.
+    query() returns Chroma-shaped results: {"ids", "distances", "metadatas"}, one list per query,
+    where distances are squared L2 distances (Chroma's default "l2" space).
+    """
+
+    def count(self) -> int:
+        raise NotImplementedError
+
+    def add(self, ids: list, embeddings: list, metadatas: list = None, documents: list = None):
+        raise NotImplementedError
+
+    def upsert(self, ids: list, embeddings: list, metadatas: list = None, documents: list = None):
+        raise NotImplementedError
+
+    def delete(self, ids: list):
+        raise NotImplementedError
+
+    def get(self, ids: list = None, include: list = None) -> dict:
+        raise NotImplementedError
+
+    def query(self, query_embeddings: list, n_results: int = 3, **kwargs) -> dict:
+        raise NotImplementedError
+
+
+class ChromaVectorStore(VectorStore):
+    """Backend on a chromadb collection (persistent, HNSW-indexed)."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def count(self) -> int:
+        return self.collection.count()
+
+    def add(self, ids, embeddings, metadatas=None, documents=None):
+        self.collection.add(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def upsert(self, ids, embeddings, metadatas=None, documents=None):
+        self.collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=documents)
+
+    def delete(self, ids):
+        self.collection.delete(ids=ids)
+
+    def get(self, ids=None, include=None):
+        return self.collection.get(ids=ids, include=include or ["metadatas"])
+
+    def query(self, query_embeddings, n_results=3, **kwargs):
+        return self.collection.query(query_embeddings=query_embeddings, n_results=n_results, **kwargs)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    In-process exact backend. L2-normalized embeddings are kept in one contiguous (n, dim)
+    matrix memory-mapped from <path>/vectors.f32 (or vectors.f16 with dtype=np.float16, which
+    halves memory for large chunk indexes), with ids and metadatas in <path>/index.json. A batch of queries is answered with one matrix multiply plus
+    argpartition. For unit vectors the squared L2 distance is 2 - 2 * cosine, so distances
+    match what the Chroma backend reports for the same normalized embeddings.
+    New ids are appended to the matrix file in place; updates and deletes rewrite it and swap
+    it in atomically. It is built for a knowledge base that is read far more often than it changes.
+    """
+
+    def __init__(self, path: str, dtype=np.float32):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self._vectors_name = f"vectors.f{self.dtype.itemsize * 8}"
+        self._lock = threading.Lock()
+        # (ids, metadatas, positions, matrix), swapped as one reference so readers never see a half-written update
+        self._state = ([], [], {}, np.zeros((0, 0), dtype=self.dtype))
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _load(self):
+        try:
+            with open(self._file("index.json"), "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except FileNotFoundError:
+            return
+        ids = index["ids"]
+        matrix = np.zeros((0, index["dim"]), dtype=self.dtype)
+        if ids:
+            matrix = np.memmap(self._file(self._vectors_name), dtype=self.dtype, mode="r", shape=(len(ids), index["dim"]))
+        self._state = (ids, index["metadatas"], {id_: row for row, id_ in enumerate(ids)}, matrix)
+
+    def _write(self, ids: list, metadatas: list, matrix: np.ndarray):
+        """Persists a full snapshot, then swaps it in."""
+        os.makedirs(self.path, exist_ok=True)
+        matrix = np.ascontiguousarray(matrix, dtype=self.dtype)
+        matrix.tofile(self._file(self._vectors_name + ".tmp"))
+        with open(self._file("index.json.tmp"), "w", encoding="utf-8") as f:
+            # json.dumps encodes in C; json.dump(obj, f) streams through the much slower Python encoder
+            f.write(json.dumps({"dim": int(matrix.shape[1]), "ids": ids, "metadatas": metadatas}))
+        os.replace(self._file(self._vectors_name + ".tmp"), self._file(self._vectors_name))
+        os.replace(self._file("index.json.tmp"), self._file("index.json"))
+        self._load()
+
+    def _append(self, ids: list, metadatas: list, rows: np.ndarray):
+        """Appends new rows to the matrix file in place instead of rewriting it."""
+        current_ids, current_metadatas, _, matrix = self._state
+        if current_ids and matrix.shape[1] != rows.shape[1]:
+            raise ValueError(f"Embedding size {rows.shape[1]} does not match the store's {matrix.shape[1]}")
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._file(self._vectors_name), "r+b" if current_ids else "wb") as f:
+            # Drop rows of an append that was interrupted before its index was written
+            f.truncate(len(current_ids) * rows.shape[1] * self.dtype.itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(rows, dtype=self.dtype).tobytes())
+        with open(self._file("index.json.tmp"), "w", encoding="utf-8") as f:
+            f.write(json.dumps({"dim": int(rows.shape[1]), "ids": current_ids + ids, "metadatas": current_metadatas + metadatas}))
+        os.replace(self._file("index.json.tmp"), self._file("index.json"))
+        self._load()
+
+    def build(self, ids: list, embeddings, metadatas: list = None):
+        """Replaces the whole store with the given vectors (bulk load)."""
+        embeddings = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        with self._lock:
+            self._write(list(ids), list(metadatas or [{} for _ in ids]), embeddings)
+
+    def count(self) -> int:
+        return len(self._state[0])
+
+    def add(self, ids, embeddings, metadatas=None, documents=None):
+        positions = self._state[2]
+        duplicates = [id_ for id_ in ids if id_ in positions]
+        if duplicates:
+            raise ValueError(f"IDs already exist: {duplicates[:5]}")
+        self.upsert(ids, embeddings, metadatas, documents)
+
+    def upsert(self, ids, embeddings, metadatas=None, documents=None):
+        new_rows = _normalize_rows(np.asarray(embeddings, dtype=np.float32))
+        metadatas = metadatas or [{} for _ in ids]
+        with self._lock:
+            current_ids, current_metadatas, positions, current = self._state
+            if len(set(ids)) == len(ids) and not any(id_ in positions for id_ in ids):
+                self._append(list(ids), list(metadatas), new_rows)
+                return
+            matrix = np.array(current) if current_ids else np.zeros((0, new_rows.shape[1]), dtype=self.dtype)
+            all_ids = list(current_ids)
+            all_metadatas = list(current_metadatas)
+            appended = []
+            for id_, row, metadata in zip(ids, new_rows, metadatas):
+                position = positions.get(id_)
+                if position is None:
+                    all_ids.append(id_)
+                    all_metadatas.append(metadata)
+                    appended.append(row)
+                else:
+                    matrix[position] = row
+                    all_metadatas[position] = metadata
+            if appended:
+                matrix = np.vstack([matrix, np.stack(appended)])
+            self._write(all_ids, all_metadatas, matrix)
+
+    def delete(self, ids):
+        with self._lock:
+            current_ids, current_metadatas, positions, matrix = self._state
+            doomed = {positions[id_] for id_ in ids if id_ in positions}
+            if not doomed:
+                return
+            keep = [row for row in range(len(current_ids)) if row not in doomed]
+            self._write([current_ids[row] for row in keep], [current_metadatas[row] for row in keep], np.asarray(matrix)[keep])
+
+    def get(self, ids=None, include=None):
+        all_ids, metadatas, positions, _ = self._state
+        rows = range(len(all_ids)) if ids is None else [positions[id_] for id_ in ids if id_ in positions]
+        return {
+            "ids": [all_ids[row] for row in rows],
+            "metadatas": [metadatas[row] for row in rows]
+        }
+
+    def query(self, query_embeddings, n_results=3, **kwargs):
+        ids, metadatas, _, matrix = self._state
+        queries = _normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        k = min(n_results, len(ids))
+        if k == 0:
+            return {"ids": [[] for _ in queries], "distances": [[] for _ in queries], "metadatas": [[] for _ in queries]}
+
+        top, top_similarities = _top_k(_similarities(queries, matrix), k)
+        return _results(ids, metadatas, top, top_similarities)
+
+
+def _similarities(queries: np.ndarray, matrix) -> np.ndarray:
+    """(n_queries, n_vectors) cosine similarities; float16 stores are up-cast block by block."""
+    if matrix.dtype == np.float32:
+        return queries @ matrix.T
+    similarities = np.empty((len(queries), len(matrix)), dtype=np.float32)
+    for start in range(0, len(matrix), _BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + _BLOCK_ROWS], dtype=np.float32)
+        similarities[:, start:start + len(block)] = queries @ block.T
+    return similarities
+
+
+def _top_k(similarities: np.ndarray, k: int) -> tuple:
+    """Column indices and values of the k largest entries of each row, best first."""
+    if k < similarities.shape[-1]:
+        top = np.argpartition(-similarities, k - 1, axis=-1)[..., :k]
+    else:
+        top = np.broadcast_to(np.arange(similarities.shape[-1]), similarities.shape)
+    top_similarities = np.take_along_axis(similarities, top, axis=-1)
+    order = np.argsort(-top_similarities, axis=-1)
+    return np.take_along_axis(top, order, axis=-1), np.take_along_axis(top_similarities, order, axis=-1)
+
+
+def _results(ids: list, metadatas: list, top, top_similarities) -> dict:
+    """Chroma-shaped query result; for unit vectors the squared L2 distance is 2 - 2 * cosine."""
+    return {
+        "ids": [[ids[row] for row in rows] for rows in top],
+        "distances": [np.maximum(0.0, 2.0 - 2.0 * np.asarray(sims)).tolist() for sims in top_similarities],
+        "metadatas": [[metadatas[row] for row in rows] for rows in top]
+    }
+
+
+def _assign(vectors, centroids: np.ndarray) -> np.ndarray:
+    """Nearest (highest cosine) centroid of every row, in chunks to bound memory."""
+    assignment = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), _BLOCK_ROWS):
+        chunk = np.asarray(vectors[start:start + _BLOCK_ROWS], dtype=np.float32)
+        assignment[start:start + len(chunk)] = np.argmax(chunk @ centroids.T, axis=1)
+    return assignment
+
+
+def _spherical_kmeans(vectors: np.ndarray, nlist: int, iterations: int, rng) -> np.ndarray:
+    """k-means on unit vectors with cosine similarity; returns (nlist, dim) unit centroids."""
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = _assign(vectors, centroids)
+        order = np.argsort(assignment, kind="stable")
+        counts = np.bincount(assignment, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        sums = np.zeros_like(centroids)
+        sums[filled] = np.add.reduceat(vectors[order], np.cumsum(counts)[filled] - counts[filled])
+        empty = np.flatnonzero(counts == 0)
+        # Re-seed empty clusters with random vectors so every list stays usable
+        sums[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+        centroids = _normalize_rows(sums)
+    return centroids
+
+
+class IVFVectorStore(NumpyVectorStore):
+    """
+    NumpyVectorStore with an inverted-file (IVF) approximate index for large knowledge bases.
+    Vectors are clustered with spherical k-means into nlist lists; a query scans only the
+    nprobe lists whose centroids are closest, then scores those candidates exactly, so the
+    returned distances are the same as exact search and only recall can drop.
+    nprobe trades recall for latency and can be overridden per call (query(..., nprobe=n)).
+    The index is persisted next to the vectors (ivf_*.npy). Appended rows are assigned to the
+    existing centroids and added to their lists; updates and deletes re-assign every row.
+    Centroids are retrained once the store has doubled since training, or by rebuild_index().
+    """
+
+    def __init__(self, path: str, nlist: int = IVF_NLIST, nprobe: int = IVF_NPROBE,
+                 min_vectors: int = IVF_MIN_VECTORS, train_iterations: int = IVF_TRAIN_ITERATIONS, seed: int = 0,
+                 dtype=np.float32):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_vectors = min_vectors
+        self.train_iterations = train_iterations
+        self.seed = seed
+        # (matrix, centroids, lists, offsets, trained_count); matrix ties the index to the snapshot it covers
+        self._index = None
+        self._appended_from = None
+        super().__init__(path, dtype)
+
+    def _matrix_stamp(self) -> list:
+        stat = os.stat(self._file(self._vectors_name))
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def _append(self, ids: list, metadatas: list, rows: np.ndarray):
+        # Rows before this position are unchanged, so _load only has to index the new ones
+        self._appended_from = len(self._state[0])
+        try:
+            super()._append(ids, metadatas, rows)
+        finally:
+            self._appended_from = None
+
+    def _load(self):
+        super()._load()
+        matrix = self._state[3]
+        if len(matrix) < self.min_vectors:
+            self._index = None
+            return
+        index, appended_from = self._index, self._appended_from
+        if (index is not None and appended_from is not None and len(index[0]) == appended_from
+                and index[4] * 2 >= len(matrix)):
+            self._extend_index(matrix, appended_from)
+            return
+        try:
+            with open(self._file("ivf.json"), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta["stamp"] == self._matrix_stamp():
+                self._index = (matrix, np.load(self._file("ivf_centroids.npy")), np.load(self._file("ivf_lists.npy")),
+                               np.load(self._file("ivf_offsets.npy")), meta["trained_count"])
+                return
+        except FileNotFoundError:
+            pass
+        self._build_index(matrix)
+
+    def rebuild_index(self):
+        """Retrains the centroids on the current vectors, e.g. after the knowledge base changed topic."""
+        with self._lock:
+            matrix = self._state[3]
+            if len(matrix) >= self.min_vectors:
+                self._build_index(matrix, retrain=True)
+
+    def _build_index(self, matrix, retrain: bool = False):
+        """Trains or re-assigns the index for the current matrix snapshot and persists it."""
+        n = len(matrix)
+        previous = self._index
+        if not retrain and previous is not None and previous[4] * 2 >= n:
+            centroids, trained_count = previous[1], previous[4]
+        else:
+            nlist = min(self.nlist or int(np.sqrt(n)), n)
+            rng = np.random.default_rng(self.seed)
+            sample_size = min(n, nlist * IVF_TRAIN_SAMPLES_PER_LIST)
+            sample = np.asarray(matrix[np.sort(rng.choice(n, sample_size, replace=False))], dtype=np.float32)
+            centroids = _spherical_kmeans(sample, nlist, self.train_iterations, rng)
+            trained_count = n
+            logger.info("Trained IVF index: %d lists over %d vectors", nlist, n)
+
+        assignment = _assign(matrix, centroids)
+        lists = np.argsort(assignment, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+        self._save_index(matrix, centroids, lists, offsets, trained_count)
+
+    def _extend_index(self, matrix, start: int):
+        """Assigns rows start.. (just appended) to the existing centroids and adds them to the end of their lists."""
+        _, centroids, lists, offsets, trained_count = self._index
+        assignment = _assign(matrix[start:], centroids)
+        order = np.argsort(assignment, kind="stable")
+        # Appended rows have the highest row numbers, so each list stays sorted
+        lists = np.insert(lists, offsets[assignment[order] + 1], start + order)
+        offsets = offsets + np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=len(centroids)))])
+        self._save_index(matrix, centroids, lists, offsets, trained_count)
+
+    def _save_index(self, matrix, centroids, lists, offsets, trained_count: int):
+        np.save(self._file("ivf_centroids.npy"), centroids)
+        np.save(self._file("ivf_lists.npy"), lists)
+        np.save(self._file("ivf_offsets.npy"), offsets)
+        with open(self._file("ivf.json"), "w", encoding="utf-8") as f:
+            json.dump({"stamp": self._matrix_stamp(), "trained_count": trained_count}, f)
+        self._index = (matrix, centroids, lists, offsets, trained_count)
+
+    def query(self, query_embeddings, n_results=3, **kwargs):
+        ids, metadatas, _, matrix = self._state
+        index = self._index
+        if index is None or index[0] is not matrix:
+            return super().query(query_embeddings, n_results, **kwargs)
+
+        _, centroids, lists, offsets, _ = index
+        queries = _normalize_rows(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        k = min(n_results, len(ids))
+        nprobe = max(1, min(kwargs.get("nprobe") or self.nprobe, len(centroids)))
+        probes = _top_k(queries @ centroids.T, nprobe)[0]
+
+        top, top_similarities = [], []
+        for query, clusters in zip(queries, probes):
+            rows = np.sort(np.concatenate([lists[offsets[c]:offsets[c + 1]] for c in clusters]))
+            if len(rows) < k:
+                rows = np.arange(len(ids))  # too few candidates in the probed lists
+            best, similarities = _top_k(np.asarray(matrix[rows], dtype=np.float32) @ query, k)
+            top.append(rows[best])
+            top_similarities.append(similarities)
+        return _results(ids, metadatas, top, top_similarities)
@@ -0,0 +1,292 @@
+# src/processing/budget_extractor.py
+
+import re
+
+from src.processing.sections import DEFAULT_EXTRACTOR
+
+# Multipliers of Indian number words ("3.15 lakh" = 315000, "1.2 crore" = 12000000)
+UNIT_MULTIPLIERS = {"lakh": 100000, "lac": 100000, "crore": 10000000, "cr": 10000000, "thousand": 1000, "k": 1000}
+
+# Column numbers "(1)", references "267310/" and dates "12.05.2015" are not amounts; the "/-" that
+# ends an Indian rupee amount ("Rs. 50,000/-") is not a reference.
+# A currency marker or unit word makes a number an amount anywhere; bare numbers only count inside
+# a budget section or table. Indian digit grouping ("18,00,000") is accepted with or without a marker.
+# The leading lookahead lets the scan skip positions that cannot start an amount cheaply.
+# The number is captured in a lookahead and consumed by a backreference: a lookahead never backtracks,
+# so "18,00,000" or "36" is taken whole or not at all (an atomic group, written so it also compiles before 3.11).
+_AMOUNT = re.compile(
+    r"(?=[₹RrIi\d])(?:(?P<currency>₹|\bRs\.?|\bINR\b)\s*|(?<![\w.,(/-]))"
+    r"(?=(?P<number>\d{1,3}(?:,\d{2,3})+(?:\.\d+)?|\d+(?:\.\d+)?))(?P=number)"
+    r"(?!/(?!-)|[)-]|[.,]\d)(?!\s*%)(?:\s*(?P<unit>lakhs?|lacs?|crores?|cr\b\.?|thousands?|k\b))?"
+    r"(?!\s*(?:%|(?:months?|years?|yrs?|days?|weeks?|hours?|nos?|units?|persons?|pages?)\b))",
+    re.IGNORECASE
+)
+# "(Rs. in lakhs)", "Amount (₹ lakh)": unit of the bare numbers that follow, in a table or section
+UNIT_DECLARATION = re.compile(
+    r"(?:\bin\b|₹|\bRs\.?|\bINR\b)\s*\(?\s*(?P<unit>lakhs?|lacs?|crores?|thousands?)\b", re.IGNORECASE
+)
+_BUDGET_HEADING = re.compile(
+    r"^\s*(?:[\d.]+\s*)?(?:(?:proposed|estimated|detailed|project|total)\s+)?"
+    r"(?:budget|cost estimates?|estimated cost|financial (?:outlay|requirements?|details)|fund requirements?)\b",
+    re.IGNORECASE
+)
+_TABLE_BUDGET_HEADER = re.compile(r"amount|cost|budget|outlay|total|₹|\bRs\b|\bINR\b|lakh|crore", re.IGNORECASE)
+_TOTAL_LABEL = re.compile(r"\btotal\b|\bproject cost\b|\boutlay\b|^\s*(?:total\s+)?budget\b", re.IGNORECASE)
+_YEAR_COLUMN = re.compile(r"\b(?:year|yr)\b|\b(?:1st|2nd|3rd|[1-5]th)\b|\b20\d\d\b", re.IGNORECASE)
+_ENUMERATION = re.compile(r"^\s*(?:\d+(?:\.\d+)*[.)]?|\(?(?:[ivx]+|[a-h])[.)])\s+", re.IGNORECASE)
+_NUMBERED_HEADING = re.compile(r"^\s*\d+(?:\.\d+)*\.?\s+[A-Za-z][^\d:]{2,60}$")
+# Sentences quoting a rule ("TA/DA in excess of Rs. 3 lakh") rather than a budget line
+_LIMIT_WORDS = re.compile(r"exceed|excess|limit|\bup ?to\b|maximum|not more than|ceiling|admissible|permissible", re.IGNORECASE)
+# Budget sections are tables and short lines; a prose paragraph ends one
+BUDGET_PROSE_LINE = 120
+_LABEL_TRIM = " \t:;-–—|.,*"
+# Lines a budget entry can be on: anything with a digit, or a heading
+_CANDIDATE = re.compile(r"\d|budget|cost|outlay|fund", re.IGNORECASE)
+# Pages worth running the (slow) PDF table finder on: they state an amount in INR or the unit of a table's amounts.
+# Searched over every page's text, so it gets the same start-character lookahead as _AMOUNT.
+BUDGET_PAGE_HINT = re.compile(
+    r"(?=[₹RrIi\d])(?:(?:₹|\bRs\.?|\bINR\b)\s*\d|\d\s*(?:lakhs?|lacs?|crores?)\b|\b\d{1,2},\d{2},\d{3}\b|"
+    + UNIT_DECLARATION.pattern + ")",
+    re.IGNORECASE
+)
+
+# Cost categories of financial_analyzer.CATEGORY_COST_KEYS, matched against line-item labels in this order
+CATEGORY_PATTERNS = [
+    ("international_travel", re.compile(r"\b(?:foreign|international|overseas)\s+(?:travel|tour)", re.IGNORECASE)),
+    ("seminar", re.compile(r"seminar|workshop|conference", re.IGNORECASE)),
+    ("travel", re.compile(r"travel|\bTA\s*/\s*DA\b|\bTA\b|\bDA\b|journey", re.IGNORECASE)),
+    ("contingency", re.compile(r"contingenc", re.IGNORECASE)),
+    ("overhead", re.compile(r"overhead|institutional (?:charges|cost)|administrative", re.IGNORECASE)),
+    ("personnel", re.compile(
+        r"salar|manpower|personnel|staff|fellow|\bJRF\b|\bSRF\b|research associate|stipend|wages|honorari",
+        re.IGNORECASE
+    )),
+    ("consumables", re.compile(r"consumable|material|chemical|supplies|reagent", re.IGNORECASE)),
+    ("equipment", re.compile(r"equipment|instrument|machinery|hardware|apparatus|computer|\bcapital\b", re.IGNORECASE)),
+]
+
+
+def _unit_multiplier(unit: str) -> int:
+    unit = unit.lower().rstrip(".")
+    return UNIT_MULTIPLIERS.get(unit.rstrip("s"), UNIT_MULTIPLIERS.get(unit, 1))
+
+
+def _category(label: str):
+    for category, pattern in CATEGORY_PATTERNS:
+        if pattern.search(label):
+            return category
+    return None
+
+
+def _clean_label(label: str) -> str:
+    return " ".join(_ENUMERATION.sub("", label).split()).strip(_LABEL_TRIM)
+
+
+class BudgetScanner:
+    """
+    Single-pass budget scanner. Feed it text lines (feed_line) and/or table rows (feed_row,
+    feed_table) in document order; budget() then returns the budget in the shape analyze_budget
+    expects. Only the running sums and the current section/table state are kept, so memory does
+    not grow with the document.
+    """
+
+    def __init__(self):
+        self.costs = {}
+        self.items = []
+        self.totals = []
+        self._in_budget = False  # inside a section with a budget heading
+        self._unit = 1  # multiplier for bare numbers, from a "(Rs. in lakhs)" declaration
+        self._category = None  # sub-heading ("Equipment") that unlabelled entries below belong to
+        self._table = None  # header information of the table whose rows are being fed
+
+    # --- amounts -------------------------------------------------------------------------
+
+    def _amounts(self, text: str, trusted: bool) -> list:
+        """(start, value, explicit) for every amount in text; bare numbers only when trusted."""
+        amounts = []
+        for match in _AMOUNT.finditer(text):
+            number, unit = match.group("number"), match.group("unit")
+            explicit = bool(match.group("currency") or unit or "," in number)
+            if not (explicit or trusted):
+                continue
+            value = float(number.replace(",", ""))
+            value *= _unit_multiplier(unit) if unit else self._unit
+            amounts.append((match.start(), value, explicit))
+        return amounts
+
+    def _record(self, label: str, value: float):
+        """Adds one line item: a total, a category amount, or an entry under the current sub-heading."""
+        if value <= 0:
+            return
+        category = _category(label)
+        if _TOTAL_LABEL.search(label):
+            if category:
+                # "Total equipment": a subtotal, which may or may not repeat entries already counted
+                self.costs[category] = max(self.costs.get(category, 0), value)
+            else:
+                self.totals.append(value)
+            return
+        category = category or self._category
+        if category is None:
+            return
+        self.costs[category] = self.costs.get(category, 0) + value
+        if label:
+            self.items.append(label)
+
+    def _declare_unit(self, text: str):
+        declaration = UNIT_DECLARATION.search(text)
+        if declaration:
+            self._unit = _unit_multiplier(declaration.group("unit"))
+
+    # --- text ----------------------------------------------------------------------------
+
+    def feed_line(self, line: str):
+        """One line of running text. Tab-separated lines (DOCX table rows) are fed as rows."""
+        if "\t" in line:
+            self.feed_row(line.split("\t"))
+            return
+        self._table = None
+        if len(line) > BUDGET_PROSE_LINE:
+            # A prose paragraph: never a budget entry, and it ends a budget section
+            self._in_budget, self._unit, self._category = False, 1, None
+            return
+        # "6. Timeline", "(b) Spectrometer 12.5": list numbering is not an amount
+        entry = _ENUMERATION.sub("", line, count=1)
+        amounts = self._amounts(entry, trusted=self._in_budget) if _CANDIDATE.search(entry) else None
+        if amounts:
+            self._feed_entry(entry, amounts)
+        else:
+            self._feed_heading(line)
+
+    def _feed_heading(self, line: str):
+        """A line without amounts: may open or close the budget section, declare a unit or a sub-heading."""
+        if _BUDGET_HEADING.match(line) and len(line) < 80:
+            self._in_budget, self._unit, self._category = True, 1, None
+        elif self._in_budget and (DEFAULT_EXTRACTOR.header(line) or (
+            _NUMBERED_HEADING.match(line) and not _category(line)
+        )):
+            self._in_budget, self._unit, self._category = False, 1, None
+        if self._in_budget:
+            self._declare_unit(line)
+            if len(line) < 60:
+                self._category = _category(line) or self._category
+
+    def _feed_entry(self, line: str, amounts: list):
+        """
+        A line with amounts: "<label> <amount> ...". The first explicit amount counts, else the last
+        number; a bare number needs a label (unlabelled ones are row numbers and the like).
+        """
+        explicit = [amount for amount in amounts if amount[2]]
+        start, value, is_explicit = explicit[0] if explicit else amounts[-1]
+        label = _clean_label(line[:start])
+        if (label or is_explicit) and len(label) <= 60 and not _LIMIT_WORDS.search(line) and (
+            self._in_budget or _category(label) or _TOTAL_LABEL.search(label)
+        ):
+            self._record(label, value)
+
+    def feed_text(self, text: str):
+        """Feeds every line of text."""
+        for line in text.splitlines():
+            self.feed_line(line)
+
+    # --- tables --------------------------------------------------------------------------
+
+    def _feed_header(self, cells: list):
+        """A header row; tables can have several (e.g. "Outlay" above "1st Yr. | 2nd Yr. | Total")."""
+        header = " ".join(cells)
+        table = self._table or {"budget": False, "total_column": None, "year_columns": [], "body": False}
+        table["budget"] = table["budget"] or bool(_TABLE_BUDGET_HEADER.search(header))
+        for n, cell in enumerate(cells):
+            if table["total_column"] is None and re.search(r"\btotal\b", cell, re.IGNORECASE):
+                table["total_column"] = n
+            if _YEAR_COLUMN.search(cell) and n not in table["year_columns"]:
+                table["year_columns"].append(n)
+        self._table = table
+        self._declare_unit(header)
+
+    def feed_row(self, cells: list):
+        """
+        One table row (cell texts; None for merged cells). Rows without amounts before the first
+        row with amounts are the table's header: they decide whether it is a budget table, its
+        unit and its Total / year columns.
+        """
+        cells = [cell or "" for cell in cells]
+        # Table finders sometimes put several rows into one cell, one per line: split them again
+        label_lines = cells[0].split("\n") if cells else []
+        if len(label_lines) > 1 and any(len(cell.split("\n")) == len(label_lines) for cell in cells[1:]):
+            parts = [cell.split("\n") for cell in cells]
+            for n in range(len(label_lines)):
+                self.feed_row([part[n] if len(part) == len(label_lines) else "" for part in parts])
+            return
+        cells = [" ".join(cell.split()) for cell in cells]
+
+        trusted = self._in_budget or bool(self._table and self._table["budget"])
+        amounts = {n: self._amounts(cell, trusted) for n, cell in enumerate(cells)}
+        amount_columns = [n for n, found in amounts.items() if found and not re.search(r"[A-Za-z]{3}", _AMOUNT.sub("", cells[n]))]
+        # Numbers left of the row's label are serial numbers ("9.3 | Equipment | ..."), not amounts
+        label_column = next((n for n, cell in enumerate(cells) if cell and n not in amount_columns), None)
+        if label_column is not None:
+            amount_columns = [n for n in amount_columns if n > label_column]
+        if not amount_columns:
+            line = " ".join(cell for cell in cells if cell)
+            found = [amount for cell_amounts in amounts.values() for amount in cell_amounts]
+            if any(amount[2] for amount in found):
+                # "Equipment: Rs 18,00,000" in a single cell
+                self._feed_entry(line, found)
+            elif self._table is None or not self._table["body"]:
+                self._feed_header(cells)
+            elif trusted:
+                self._category = _category(_clean_label(line)) or self._category
+            return
+        if self._table is None:
+            self._feed_header([])
+        self._table["body"] = True
+
+        label = _clean_label(" ".join(cells[n] for n in range(len(cells)) if n not in amount_columns and cells[n]))
+        total_column, year_columns = self._table["total_column"], self._table["year_columns"]
+        if total_column in amount_columns:
+            value = amounts[total_column][0][1]
+        elif len(year_columns) > 1 and set(amount_columns) <= set(year_columns):
+            value = sum(amounts[n][0][1] for n in amount_columns)
+        else:
+            value = amounts[amount_columns[-1]][0][1]
+        if trusted or _category(label) or _TOTAL_LABEL.search(label):
+            self._record(label, value)
+
+    def feed_table(self, rows: list):
+        """Feeds the rows of one table (e.g. from PyMuPDF's table finder), first row first."""
+        self._table = None
+        for row in rows:
+            self.feed_row(row)
+        self._table = None
+
+    # --- result --------------------------------------------------------------------------
+
+    def budget(self):
+        """
+        {"total_cost", "costs", "items"} for analyze_budget, or None if nothing budget-like was found.
+        The total is the largest stated total (the grand total), or the sum of the categories if larger.
+        """
+        if not self.costs and not self.totals:
+            return None
+        costs = {category: int(round(amount)) for category, amount in self.costs.items()}
+        total_cost = int(round(max(self.totals + [sum(self.costs.values())])))
+        return {"total_cost": total_cost, "costs": costs, "items": list(dict.fromkeys(self.items))}
+
+
+def extract_budget(text: str, tables: list = ()):
+    """
+    Budget of a proposal from its text and, optionally, its tables (lists of rows) found by a
+    layout-aware table finder. Tables win when they contain budget lines, since their rows
+    also appear, flattened, in the text. Returns None when the proposal states no budget.
+    """
+    if tables:
+        scanner = BudgetScanner()
+        for table in tables:
+            scanner.feed_table(table)
+        budget = scanner.budget()
+        if budget and budget["costs"]:
+            return budget
+    scanner = BudgetScanner()
+    scanner.feed_text(text)
+    return scanner.budget()
@@ -0,0 +1,36 @@
+# src/processing/chunker.py
+
+import os
+
+from src.processing.document_parser import extract_sections
+
+# all-MiniLM-L6-v2 reads at most 256 word pieces; ~160 words stay under that for typical proposal prose
+CHUNK_MAX_WORDS = int(os.getenv("EVALUATOR_CHUNK_MAX_WORDS", "160"))
+# Words repeated between consecutive windows of a long section, so no sentence is only seen cut in half
+CHUNK_OVERLAP_WORDS = int(os.getenv("EVALUATOR_CHUNK_OVERLAP_WORDS", "32"))
+# Sections that describe other work rather than the proposal itself
+SKIPPED_SECTIONS = {"references"}
+
+
+def chunk_sections(sections: dict, max_words: int = CHUNK_MAX_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS) -> list:
+    """
+    Splits a section dict (as returned by extract_sections) into embeddable chunks.
+    Short sections become one chunk; longer ones are split into overlapping word windows.
+    Returns a list of (section_name, chunk_text) in document order.
+    """
+    step = max(1, max_words - overlap_words)
+    chunks = []
+    for section, content in sections.items():
+        if section in SKIPPED_SECTIONS:
+            continue
+        words = content.split()
+        for start in range(0, max(1, len(words) - overlap_words), step):
+            window = words[start:start + max_words]
+            if window:
+                chunks.append((section, " ".join(window)))
+    return chunks
+
+
+def chunk_text(text: str, max_words: int = CHUNK_MAX_WORDS, overlap_words: int = CHUNK_OVERLAP_WORDS) -> list:
+    """Sections the raw text with extract_sections, then chunks it like chunk_sections."""
+    return chunk_sections(extract_sections(text), max_words, overlap_words)
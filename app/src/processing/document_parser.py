@@ -1,127 +1,308 @@
 # src/processing/document_parser.py
 
-import fitz  # PyMuPDF
-import docx
 import os
-import re
+import io
 import json
+import logging
 from datetime import datetime
 
-def extract_text_from_pdf(file_path: str) -> str:
-    """Extracts all text from a given PDF file."""
+from src.processing.budget_extractor import BUDGET_PAGE_HINT, UNIT_DECLARATION, extract_budget
+from src.processing.sections import DEFAULT_EXTRACTOR
+
+logger = logging.getLogger(__name__)
+
+# Every extractor accepts a source that is a file path, raw bytes, or a binary file-like object,
+# so uploads can be parsed straight from memory without a temp-file round-trip.
+
+# Pages per task when a PDF's pages are spread across a process pool
+PDF_PAGES_PER_TASK = int(os.getenv("EVALUATOR_PDF_PAGES_PER_TASK", "16"))
+# Bump when extraction output changes, so cached texts are not reused
+PARSER_VERSION = "4"
+# PDF pages the table finder runs on, at most: only pages that state INR amounts qualify, and
+# finding tables costs far more than extracting text
+BUDGET_TABLE_PAGES = int(os.getenv("EVALUATOR_BUDGET_TABLE_PAGES", "4"))
+
+def _source_name(source) -> str:
+    """Short name of a parser source, for log messages."""
+    if isinstance(source, str):
+        return os.path.basename(source)
+    return getattr(source, "name", None) or f"<{type(source).__name__}>"
+
+def _read_bytes(source) -> bytes:
+    """Returns the bytes of an in-memory source (bytes or file-like object)."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return bytes(source)
+    return source.read()
+
+def _open_pdf(source):
+    import fitz  # PyMuPDF, imported on first use to keep server start-up fast
+    if isinstance(source, str):
+        return fitz.open(source)
+    return fitz.open(stream=_read_bytes(source), filetype="pdf")
+
+def _extract_pdf_page_range(source, start: int, stop: int) -> list:
+    """Texts of pages [start, stop) of a PDF given as a path or bytes; one process-pool task."""
+    with _open_pdf(source) as doc:
+        return [doc[number].get_text() for number in range(start, min(stop, doc.page_count))]
+
+def iter_pdf_pages(source):
+    """Yields the text of each page in order, for consumers that stream pages instead of waiting for the whole text."""
+    with _open_pdf(source) as doc:
+        for page in doc:
+            yield page.get_text()
+
+def _extract_pdf_pages(source, executor=None) -> list:
+    """Page texts of a PDF; with an executor, page ranges of PDF_PAGES_PER_TASK pages run in parallel."""
+    if executor is None:
+        return list(iter_pdf_pages(source))
+    with _open_pdf(source) as doc:
+        page_count = doc.page_count
+    futures = [
+        executor.submit(_extract_pdf_page_range, source, start, start + PDF_PAGES_PER_TASK)
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    ]
+    return [page for future in futures for page in future.result()]
+
+def extract_text_from_pdf(source, executor=None) -> str:
+    """
+    Extracts all text from a given PDF file (path, bytes or file-like object).
+    With an executor (e.g. the shared process pool), page ranges of PDF_PAGES_PER_TASK pages
+    are extracted in parallel; pages are joined once at the end either way.
+    """
     try:
-        with fitz.open(file_path) as doc:
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            print(f"Successfully extracted text from PDF: {os.path.basename(file_path)}")
-            return text
+        if executor is not None and not isinstance(source, str):
+            source = _read_bytes(source)
+        text = "".join(_extract_pdf_pages(source, executor))
+        logger.debug("Successfully extracted text from PDF: %s", _source_name(source))
+        return text
     except Exception as e:
-        print(f"Error reading PDF {file_path}: {e}")
+        logger.warning("Error reading PDF %s: %s", _source_name(source), e)
         return ""
 
-def extract_text_from_docx(file_path: str) -> str:
-    """Extracts all text from a given DOCX file."""
+def _find_pdf_tables(source, page_numbers: list) -> list:
+    """
+    Rows of every table PyMuPDF's table finder detects on the given pages; one process-pool task.
+    A caption just above a table that declares its unit ("Budget (Rs. in lakhs)") becomes its first row.
+    """
+    import fitz
+    tables = []
+    with _open_pdf(source) as doc:
+        for number in page_numbers:
+            page = doc[number]
+            for table in page.find_tables().tables:
+                top = table.bbox[1]
+                caption = " ".join(page.get_text(clip=fitz.Rect(0, max(0, top - 40), page.rect.width, top)).split())
+                rows = table.extract()
+                tables.append([[caption]] + rows if UNIT_DECLARATION.search(caption) else rows)
+    return tables
+
+def find_pdf_budget_tables(source, page_texts: list, executor=None) -> list:
+    """
+    Tables (lists of rows) on the first BUDGET_TABLE_PAGES pages whose text states INR amounts.
+    Other pages are never handed to the table finder.
+    """
+    pages = [number for number, text in enumerate(page_texts) if BUDGET_PAGE_HINT.search(text)][:BUDGET_TABLE_PAGES]
+    if not pages:
+        return []
+    if executor is None:
+        return _find_pdf_tables(source, pages)
+    futures = [executor.submit(_find_pdf_tables, source, [number]) for number in pages]
+    return [table for future in futures for table in future.result()]
+
+# WordprocessingML element tags used by the streaming DOCX reader
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_BODY, _W_P, _W_R, _W_HYPERLINK = _W + "body", _W + "p", _W + "r", _W + "hyperlink"
+_W_TBL, _W_TR, _W_TC = _W + "tbl", _W + "tr", _W + "tc"
+# Run children with a fixed text equivalent (same mapping as python-docx's Run.text);
+# <w:t> contributes its text and <w:br> a newline unless it is a page or column break
+_W_RUN_TEXT = {_W + "tab": "\t", _W + "ptab": "\t", _W + "cr": "\n", _W + "noBreakHyphen": "-"}
+
+def iter_docx_blocks(source):
+    """
+    Streams a DOCX file's body in document order without building the document tree:
+    yields ("paragraph", text) for every body paragraph and ("row", [cell text, ...]) for every
+    table row, a cell's paragraphs joined by newlines. word/document.xml is read incrementally
+    from the zip and finished elements are dropped, so memory stays bounded by the largest
+    paragraph or table row; images and other package parts are never read.
+    """
+    import zipfile
+    from xml.etree.ElementTree import iterparse
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with zipfile.ZipFile(source) as package, package.open("word/document.xml") as document_xml:
+        path = []  # open elements, root first
+        paragraph, paragraph_depth = None, 0  # text parts of the paragraph being read
+        rows, cells = [], []  # (depth, texts) of open table rows / cells; tables can nest
+        for event, element in iterparse(document_xml, events=("start", "end")):
+            tag = element.tag
+            if event == "start":
+                path.append(element)
+                if paragraph is not None:
+                    continue  # text boxes etc. nested in a run are not part of the paragraph text
+                parent_tag = path[-2].tag if len(path) > 1 else None
+                if tag == _W_P and parent_tag in (_W_BODY, _W_TC):
+                    paragraph, paragraph_depth = [], len(path)
+                elif tag == _W_TR and parent_tag == _W_TBL:
+                    rows.append((len(path), []))
+                elif tag == _W_TC and parent_tag == _W_TR:
+                    cells.append((len(path), []))
+                continue
+
+            depth = len(path)
+            if paragraph is not None and depth > paragraph_depth:
+                # Runs count when they are direct children of the paragraph or of its hyperlinks
+                if path[-2].tag == _W_R and (
+                    depth == paragraph_depth + 2
+                    or (depth == paragraph_depth + 3 and path[-3].tag == _W_HYPERLINK)
+                ):
+                    if tag == _W + "t":
+                        paragraph.append(element.text or "")
+                    elif tag == _W + "br":
+                        if element.get(_W + "type", "textWrapping") == "textWrapping":
+                            paragraph.append("\n")
+                    elif tag in _W_RUN_TEXT:
+                        paragraph.append(_W_RUN_TEXT[tag])
+            elif tag == _W_P and depth == paragraph_depth:
+                text = "".join(paragraph)
+                paragraph = None
+                if path[-2].tag == _W_BODY:
+                    yield ("paragraph", text)
+                else:
+                    cells[-1][1].append(text)
+            elif tag == _W_TC and cells and cells[-1][0] == depth:
+                rows[-1][1].append("\n".join(cells.pop()[1]))
+            elif tag == _W_TR and rows and rows[-1][0] == depth:
+                yield ("row", rows.pop()[1])
+
+            path.pop()
+            # Drop finished paragraphs, rows and top-level blocks from the partial tree
+            if path and (tag in (_W_P, _W_TR) or path[-1].tag == _W_BODY):
+                path[-1].remove(element)
+
+def extract_text_from_docx(source) -> str:
+    """
+    Extracts all text from a given DOCX file (path, bytes or file-like object), streaming it with
+    iter_docx_blocks: one line per body paragraph and per table row (cells separated by tabs).
+    """
     try:
-        doc = docx.Document(file_path)
-        full_text = []
-        for para in doc.paragraphs:
-            full_text.append(para.text)
-        print(f"Successfully extracted text from DOCX: {os.path.basename(file_path)}")
-        return '\n'.join(full_text)
+        text = "\n".join(
+            text if kind == "paragraph" else "\t".join(text)
+            for kind, text in iter_docx_blocks(source)
+        )
+        logger.debug("Successfully extracted text from DOCX: %s", _source_name(source))
+        return text
     except Exception as e:
-        print(f"Error reading DOCX {file_path}: {e}")
+        logger.warning("Error reading DOCX %s: %s", _source_name(source), e)
         return ""
 
-def extract_text_from_txt(file_path: str) -> str:
-    """Extracts all text from a given TXT file."""
+def extract_text_from_txt(source) -> str:
+    """Extracts all text from a given TXT file (path, bytes or file-like object)."""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            text = f.read()
-        print(f"Successfully extracted text from TXT: {os.path.basename(file_path)}")
+        if isinstance(source, str):
+            with open(source, 'r', encoding='utf-8') as f:
+                text = f.read()
+        else:
+            text = _read_bytes(source).decode('utf-8')
+        logger.debug("Successfully extracted text from TXT: %s", _source_name(source))
         return text
     except Exception as e:
-        print(f"Error reading TXT {file_path}: {e}")
+        logger.warning("Error reading TXT %s: %s", _source_name(source), e)
         return ""
 
 def extract_sections(text: str) -> dict:
     """
-    Extracts structured sections from raw text based on common headers using a more flexible regex.
+    Extracts structured sections from raw text based on common headers
+    (see src/processing/sections.py for the configurable, precompiled extractor).
     """
-    print("Attempting to extract structured sections...")
-    sections = {}
-    
-    headers = [
-        "Abstract", "Introduction & Background", "Introduction", "Background",
-        "Proposed Methodology", "Methodology", "System Design",
-        "Expected Outcomes & Conclusion", "Conclusion", "References"
-    ]
-    
-    pattern = r"^\s*(?:\d+\.\s*)?(" + "|".join(headers) + r")\b"
-    
-    parts = re.split(pattern, text, flags=re.IGNORECASE | re.MULTILINE)
-    
-    if len(parts) <= 1:
-        print("No standard headers found. Returning all text as 'unclassified'.")
-        return {"unclassified": text.strip()}
-
-    if parts[0].strip():
-        sections["preamble"] = parts[0].strip()
+    return DEFAULT_EXTRACTOR.extract(text)
 
-    for i in range(1, len(parts), 2):
-        header = parts[i].strip().lower().replace(" & ", "_and_").replace(" ", "_")
-        content = parts[i+1].strip()
-        sections[header] = content
+def extract_section_spans(text: str) -> list:
+    """Like extract_sections, but returns (name, start, end) offsets into text instead of copies."""
+    return DEFAULT_EXTRACTOR.spans(text)
 
-    print(f"Successfully extracted {len(sections)} sections.")
-    return sections
-
-def parse_document(file_path: str) -> str:
+def parse_document(source, filename: str = None, executor=None) -> str:
     """
     Parses a document (PDF, DOCX, or TXT) and returns its text content.
+    source is a file path, bytes or a file-like object; filename decides the
+    file type for in-memory sources and defaults to the path itself.
+    executor, if given, extracts PDF pages in parallel (see extract_text_from_pdf).
     """
-    file_extension = os.path.splitext(file_path)[1].lower()
+    file_extension = os.path.splitext(filename or source)[1].lower()
 
     if file_extension == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(source, executor)
     elif file_extension == '.docx':
-        return extract_text_from_docx(file_path)
+        return extract_text_from_docx(source)
     elif file_extension == '.txt':
-        return extract_text_from_txt(file_path)
+        return extract_text_from_txt(source)
     else:
-        print(f"Unsupported file type: {file_extension}. Supported types: .pdf, .docx, .txt")
+        logger.warning("Unsupported file type: %s. Supported types: .pdf, .docx, .txt", file_extension)
         return ""
 
-def process_new_proposal(file_path: str) -> dict:
+def parse_proposal(source, filename: str = None, executor=None) -> tuple:
+    """
+    Parses a proposal into (text, budget): the text as parse_document returns it, and the budget
+    found in its budget section or tables (see src/processing/budget_extractor.py), or None.
+    PDF tables are read with PyMuPDF's table finder, DOCX tables arrive as tab-separated lines.
+    """
+    file_extension = os.path.splitext(filename or source)[1].lower()
+    if file_extension != '.pdf':
+        text = parse_document(source, filename, executor)
+        return text, extract_budget(text) if text else None
+
+    try:
+        if not isinstance(source, str):
+            source = _read_bytes(source)
+        page_texts = _extract_pdf_pages(source, executor)
+        logger.debug("Successfully extracted text from PDF: %s", _source_name(source))
+    except Exception as e:
+        logger.warning("Error reading PDF %s: %s", _source_name(source), e)
+        return "", None
+    text = "".join(page_texts)
+    try:
+        tables = find_pdf_budget_tables(source, page_texts, executor)
+    except Exception as e:
+        logger.warning("Error finding budget tables in PDF %s: %s", _source_name(source), e)
+        tables = []
+    return text, extract_budget(text, tables)
+
+def structure_proposal(raw_text: str, source_file: str, budget: dict = None) -> dict:
+    """Structures extracted text (and the budget found in it, if any) into the standardized proposal JSON object."""
+    return {
+        "source_file": source_file,
+        "ingestion_timestamp": datetime.now().isoformat(),
+        "content": extract_sections(raw_text),
+        "budget": budget
+    }
+
+def process_new_proposal(source, filename: str = None, executor=None) -> dict:
     """
     The main pipeline function for processing a single new proposal file.
     It reads the file, extracts text, and structures it into a standardized JSON object.
+    source is a file path, or bytes / a file-like object together with the upload's filename.
     """
-    print(f"\n--- Starting Full Processing Pipeline for: {os.path.basename(file_path)} ---")
+    source_file = os.path.basename(filename or source)
+    logger.info("Starting full processing pipeline for: %s", source_file)
     
-    # Step 1.1: Get the raw text from the document
-    raw_text = parse_document(file_path)
+    # Step 1.1: Get the raw text (and budget) from the document
+    raw_text, budget = parse_proposal(source, filename, executor)
     
     if not raw_text:
-        print("Processing failed: could not extract text.")
+        logger.warning("Processing failed: could not extract text.")
         return None
 
-    # Step 1.2: Structure the text into sections
-    structured_content = extract_sections(raw_text)
-    
-    # Step 1.3: Create the final standardized JSON object
-    final_output = {
-        "source_file": os.path.basename(file_path),
-        "ingestion_timestamp": datetime.now().isoformat(),
-        "content": structured_content
-    }
+    # Step 1.2 + 1.3: Structure the text into sections and the standardized JSON object
+    final_output = structure_proposal(raw_text, source_file, budget)
     
-    print("--- Successfully processed and structured the document ---")
+    logger.info("Successfully processed and structured the document")
     return final_output
 
 
 # --- Main block for testing the complete pipeline ---
 if __name__ == '__main__':
+    from src.core.tracing import configure_logging
+    configure_logging()
     # We can test with either the PDF or the DOCX file
     test_file_to_process = 'data/raw/dummy_proposal.docx'
     
@@ -0,0 +1,98 @@
+# src/processing/sections.py
+
+import os
+import re
+from typing import NamedTuple
+
+DEFAULT_SECTION_HEADERS = [
+    "Abstract", "Introduction & Background", "Introduction", "Background",
+    "Proposed Methodology", "Methodology", "System Design",
+    "Expected Outcomes & Conclusion", "Conclusion", "References"
+]
+# Comma-separated override of the header vocabulary. Order matters: earlier headers win,
+# so list longer headers before their prefixes ("Introduction & Background" before "Introduction").
+SECTION_HEADERS = [
+    header.strip() for header in os.getenv("EVALUATOR_SECTION_HEADERS", ",".join(DEFAULT_SECTION_HEADERS)).split(",")
+    if header.strip()
+]
+
+
+class SectionSpan(NamedTuple):
+    """A section's key and the [start, end) offsets of its whitespace-trimmed content in the source text."""
+    name: str
+    start: int
+    end: int
+
+
+def section_key(header: str) -> str:
+    """Dictionary key of a matched header, e.g. "Introduction & Background" -> "introduction_and_background"."""
+    return header.strip().lower().replace(" & ", "_and_").replace(" ", "_")
+
+
+def _trimmed(text: str, start: int, end: int) -> tuple:
+    """Offsets of text[start:end].strip() without copying the slice."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+class SectionExtractor:
+    """
+    Splits proposal text at known section headers (optionally numbered, e.g. "2. Methodology",
+    at the start of a line, case-insensitive). The header pattern is compiled once per extractor,
+    and each text is scanned in a single pass that records offsets instead of copying sections.
+    """
+
+    def __init__(self, headers: list = None):
+        self.headers = list(headers or SECTION_HEADERS)
+        # Anchored with match() at line starts instead of "^" + MULTILINE: a header can only
+        # start a line, so trying the pattern at every character is wasted work.
+        self._pattern = re.compile(
+            r"\s*(?:\d+\.\s*)?(" + "|".join(re.escape(header) for header in self.headers) + r")\b",
+            re.IGNORECASE
+        )
+
+    def _header_matches(self, text: str):
+        """Header matches in document order; same matches as finditer with "^" + re.MULTILINE."""
+        match, find = self._pattern.match, text.find
+        position = 0
+        while True:
+            header = match(text, position)
+            if header:
+                yield header
+                # A header ends on a word character, so the next candidate is the next line start
+                position = header.end()
+            position = find("\n", position) + 1
+            if position == 0:
+                return
+
+    def header(self, line: str):
+        """Section key of the header that line starts with, or None."""
+        match = self._pattern.match(line)
+        return section_key(match.group(1)) if match else None
+
+    def spans(self, text: str) -> list:
+        """
+        SectionSpans in document order: an optional "preamble" before the first header, then one
+        span per header. Text without any header is a single "unclassified" span.
+        """
+        spans = []
+        previous_name, previous_end = "preamble", 0
+        for match in self._header_matches(text):
+            start, end = _trimmed(text, previous_end, match.start())
+            if start < end or previous_name != "preamble":
+                spans.append(SectionSpan(previous_name, start, end))
+            previous_name, previous_end = section_key(match.group(1)), match.end()
+        if not spans and previous_name == "preamble":
+            return [SectionSpan("unclassified", *_trimmed(text, 0, len(text)))]
+        spans.append(SectionSpan(previous_name, *_trimmed(text, previous_end, len(text))))
+        return spans
+
+    def extract(self, text: str) -> dict:
+        """Section name -> content. A repeated header keeps its first position and its last content."""
+        return {span.name: text[span.start:span.end] for span in self.spans(text)}
+
+
+DEFAULT_EXTRACTOR = SectionExtractor()
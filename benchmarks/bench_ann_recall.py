@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# benchmarks/bench_ann_recall.py
+#
+# Measures recall@k and latency of the IVF novelty index against exact search on the same corpus.
+# Run from the repository root:
+#     python benchmarks/bench_ann_recall.py [--size 1000000] [--nprobe 1 4 8 16 32]
+#     python benchmarks/bench_ann_recall.py --store vector_db/numpy_proposals   # an existing knowledge base
+# Recall is the fraction of the exact top-k ids the index also returns; distances of returned
+# ids are always exact, so max_similarity_percentage only changes when the true nearest project is missed.
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "app"))
+
+from src.models.vector_store import IVFVectorStore, NumpyVectorStore  # noqa: E402
+
+
+def _clustered_unit_vectors(rng, n: int, dim: int, topics: int) -> np.ndarray:
+    """Synthetic corpus with topic structure, closer to real proposal embeddings than uniform noise."""
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, topics, n)] + 0.6 * rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def _timed_query(store, queries: np.ndarray, k: int, **kwargs) -> tuple:
+    """Queries one vector per call, like a single upload, and returns (merged results, mean ms per query)."""
+    merged = {"ids": [], "distances": []}
+    started = time.perf_counter()
+    for query in queries:
+        results = store.query(query_embeddings=[query], n_results=k, **kwargs)
+        merged["ids"] += results["ids"]
+        merged["distances"] += results["distances"]
+    return merged, (time.perf_counter() - started) * 1000 / len(queries)
+
+
+def recall_at_k(approximate: dict, exact: dict) -> float:
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approximate["ids"], exact["ids"]))
+    return hits / max(1, sum(len(e) for e in exact["ids"]))
+
+
+def top1_agreement(approximate: dict, exact: dict) -> float:
+    """Fraction of queries whose most similar project (what max_similarity_percentage uses) is found."""
+    return float(np.mean([a[:1] == e[:1] for a, e in zip(approximate["ids"], exact["ids"])]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="IVF recall/latency against exact search")
+    parser.add_argument("--store", default=None, help="Existing numpy vector-store directory to evaluate (copied first)")
+    parser.add_argument("--size", type=int, default=100000, help="Synthetic corpus size when --store is not given")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--topics", type=int, default=2000, help="Topic clusters in the synthetic corpus")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (0 = sqrt(n))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    workdir = tempfile.mkdtemp()
+    try:
+        if args.store:
+            path = os.path.join(workdir, "store")
+            shutil.copytree(args.store, path)
+            exact_store = NumpyVectorStore(path)
+            corpus = exact_store._state[3]
+            query_rows = rng.choice(len(corpus), min(args.queries, len(corpus)), replace=False)
+            # Perturbed copies of stored vectors stand in for new proposals on the same topics
+            queries = np.asarray(corpus[np.sort(query_rows)]) + 0.3 * rng.standard_normal((len(query_rows), corpus.shape[1]), dtype=np.float32)
+        else:
+            path = os.path.join(workdir, "store")
+            corpus = _clustered_unit_vectors(rng, args.size + args.queries, args.dim, args.topics)
+            queries = corpus[args.size:]
+            exact_store = NumpyVectorStore(path)
+            exact_store.build([f"v{i}" for i in range(args.size)], corpus[:args.size], [{"title": f"v{i}"} for i in range(args.size)])
+
+        started = time.perf_counter()
+        index = IVFVectorStore(path, nlist=args.nlist, min_vectors=0)
+        print(f"Corpus: {index.count()} vectors, {len(queries)} queries, k={args.k}; "
+              f"IVF build {time.perf_counter() - started:.2f}s with {len(index._index[1])} lists")
+
+        exact, exact_ms = _timed_query(exact_store, queries, args.k)
+        print(f"{'search':>12} {'recall@k':>9} {'top-1':>7} {'ms/query':>9}")
+        print(f"{'exact':>12} {1.0:9.3f} {1.0:7.3f} {exact_ms:9.3f}")
+        for nprobe in args.nprobe:
+            approximate, ivf_ms = _timed_query(index, queries, args.k, nprobe=nprobe)
+            print(f"{'nprobe=' + str(nprobe):>12} {recall_at_k(approximate, exact):9.3f} "
+                  f"{top1_agreement(approximate, exact):7.3f} {ivf_ms:9.3f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
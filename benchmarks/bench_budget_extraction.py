@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# benchmarks/bench_budget_extraction.py
+#
+# Measures what budget extraction adds to parsing:
+#   text   - BudgetScanner throughput on large annexure-style texts (prose, budget sections and
+#            tab-separated table rows as the DOCX reader emits them), in MB/s
+#   pdf    - extract_text_from_pdf vs parse_proposal (text + table finder on budget pages + scan)
+#            on generated PDFs with many prose pages and one ruled budget table
+# Every run checks that the expected budget is recovered.
+# Run from the repository root:
+#     python benchmarks/bench_budget_extraction.py [--sizes-mb 1 8 32] [--pages 50 300]
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "app"))
+
+import src.processing.document_parser as document_parser  # noqa: E402
+from src.processing.budget_extractor import extract_budget  # noqa: E402
+
+# Wrapped like text extracted from a PDF, so most lines are short enough to be budget lines
+PROSE = (
+    "The proposed research will deploy sensor networks across 12 underground panels and\n"
+    "analyse strata behaviour over 24 months, reducing unplanned downtime by 30% compared\n"
+    "with 2019 levels. Field trials in 3 mines will validate the early-warning models.\n"
+)
+BUDGET_ROWS = [
+    ("Equipment", "12.50", "5.50", "18.00"),
+    ("Salaries (2 JRF)", "6.00", "7.50", "13.50"),
+    ("Consumables", "2.00", "2.50", "4.50"),
+    ("Travel (TA/DA)", "1.50", "1.50", "3.00"),
+    ("Contingency", "0.60", "0.75", "1.35"),
+    ("Total", "22.60", "17.75", "40.35"),
+]
+EXPECTED = {
+    "total_cost": 4035000,
+    "costs": {"equipment": 1800000, "personnel": 1350000, "consumables": 450000, "travel": 300000, "contingency": 135000},
+}
+
+
+def _budget_section() -> str:
+    lines = ["6. Budget Estimate", "Item\tYear 1 (Rs. in lakhs)\tYear 2\tTotal"]
+    lines += ["\t".join(row) for row in BUDGET_ROWS]
+    return "\n".join(lines) + "\n7. Timeline\n"
+
+
+def _build_text(size_mb: float) -> str:
+    """Prose padded to size_mb with one budget section in the middle."""
+    prose = PROSE * max(1, int(size_mb * 1024 * 1024 / len(PROSE) / 2))
+    return prose + _budget_section() + prose
+
+
+def _build_pdf(prose_pages: int) -> bytes:
+    """prose_pages pages of text, then one page with a ruled budget table."""
+    import fitz
+    doc = fitz.open()
+    for _ in range(prose_pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), PROSE * 16, fontsize=10)
+    page = doc.new_page()
+    page.insert_text((50, 60), "6. Budget Estimate (Rs. in lakhs)", fontsize=12)
+    header = ("Item", "Year 1", "Year 2", "Total")
+    widths, row_height, top = (200, 100, 100, 100), 24, 80
+    for r, row in enumerate([header] + BUDGET_ROWS):
+        x = 50
+        for cell, width in zip(row, widths):
+            rect = fitz.Rect(x, top + r * row_height, x + width, top + (r + 1) * row_height)
+            page.draw_rect(rect, color=(0, 0, 0), width=0.5)
+            page.insert_text((rect.x0 + 4, rect.y1 - 8), cell, fontsize=10)
+            x += width
+    return doc.tobytes()
+
+
+def _time(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def _check(budget: dict):
+    assert budget and {key: budget[key] for key in EXPECTED} == EXPECTED, budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Budget extraction benchmark")
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 300])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'text MB':>8} {'scan ms':>9} {'MB/s':>7}")
+    for size_mb in args.sizes_mb:
+        text = _build_text(size_mb)
+        _check(extract_budget(text))
+        scan_ms = _time(lambda: extract_budget(text), args.repeats)
+        megabytes = len(text.encode("utf-8")) / 1024 / 1024
+        print(f"{megabytes:8.1f} {scan_ms:9.1f} {megabytes / scan_ms * 1000:7.1f}")
+
+    print(f"\n{'pages':>6} {'text ms':>9} {'text+budget ms':>15} {'overhead':>9}")
+    for pages in args.pages:
+        data = _build_pdf(pages)
+        _check(document_parser.parse_proposal(data, "bench.pdf")[1])
+        text_ms = _time(lambda: document_parser.extract_text_from_pdf(data), args.repeats)
+        proposal_ms = _time(lambda: document_parser.parse_proposal(data, "bench.pdf"), args.repeats)
+        print(f"{pages + 1:6d} {text_ms:9.1f} {proposal_ms:15.1f} {proposal_ms / text_ms - 1:8.0%}")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# benchmarks/bench_docx_extraction.py
+#
+# Compares DOCX text extraction on generated documents of growing size (paragraphs, tables and
+# an embedded image blob):
+#   python-docx - the previous extractor (full object tree, paragraph list, join)
+#   streaming   - iter_docx_blocks (incremental parse of word/document.xml)
+# Each parser runs in a fresh child process, so the reported peak RSS is its own.
+# Run from the repository root:
+#     python benchmarks/bench_docx_extraction.py [--paragraphs 10000 100000 400000] [--image-mb 20]
+
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+import zipfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "app"))
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _document_xml(paragraphs: int):
+    """Yields word/document.xml in pieces: paragraphs with a 3x4 table every 50 paragraphs."""
+    yield f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<w:document xmlns:w="{W_NS}"><w:body>'
+    for i in range(paragraphs):
+        yield (f'<w:p><w:r><w:t xml:space="preserve">Paragraph {i}: the proposed methodology </w:t></w:r>'
+               f'<w:r><w:tab/><w:t>evaluates coal beneficiation at pilot scale.</w:t></w:r></w:p>')
+        if i % 50 == 49:
+            rows = "".join(
+                "<w:tr>" + "".join(f"<w:tc><w:p><w:r><w:t>cell {i}.{r}.{c}</w:t></w:r></w:p></w:tc>" for c in range(4)) + "</w:tr>"
+                for r in range(3)
+            )
+            yield f"<w:tbl>{rows}</w:tbl>"
+    yield "<w:sectPr/></w:body></w:document>"
+
+
+def build_docx(path: str, paragraphs: int, image_mb: int):
+    """Writes a DOCX with the given number of paragraphs, reusing python-docx's package parts."""
+    import docx
+    template = io.BytesIO()
+    docx.Document().save(template)
+    with zipfile.ZipFile(template) as source, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as target:
+        for item in source.infolist():
+            if item.filename != "word/document.xml":
+                target.writestr(item, source.read(item.filename))
+        with target.open("word/document.xml", "w") as document_xml:
+            for piece in _document_xml(paragraphs):
+                document_xml.write(piece.encode("utf-8"))
+        if image_mb:
+            target.writestr("word/media/image1.bin", os.urandom(image_mb * 1024 * 1024), zipfile.ZIP_STORED)
+
+
+def _run_parser(parser: str, path: str):
+    """Child-process entry point: extracts the text and prints seconds, peak RSS and a checksum."""
+    import src.processing.document_parser as document_parser
+    started = time.perf_counter()
+    if parser == "python-docx":
+        import docx
+        text = "\n".join(paragraph.text for paragraph in docx.Document(path).paragraphs)
+    else:
+        text = "\n".join(value for kind, value in document_parser.iter_docx_blocks(path) if kind == "paragraph")
+    print(time.perf_counter() - started, _peak_rss_mb(), zlib.crc32(text.encode("utf-8")), len(text))
+
+
+def _measure(parser: str, path: str) -> tuple:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", parser, path],
+        check=True, capture_output=True, text=True
+    ).stdout.split()
+    return float(output[0]), float(output[1]), output[2], int(output[3])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DOCX extraction benchmark")
+    parser.add_argument("--paragraphs", type=int, nargs="+", default=[10000, 100000, 400000])
+    parser.add_argument("--image-mb", type=int, default=20, help="Size of the embedded image blob")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_parser(*args.child)
+        sys.exit(0)
+
+    # Body paragraphs only: python-docx's Document.paragraphs skips table cells, the streaming
+    # reader yields them as separate "row" blocks
+    print(f"{'paragraphs':>10} {'docx MB':>8} {'python-docx s':>14} {'RSS MB':>7} {'streaming s':>12} {'RSS MB':>7}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for count in args.paragraphs:
+            path = os.path.join(workdir, f"bench_{count}.docx")
+            build_docx(path, count, args.image_mb)
+            baseline_s, baseline_mb, baseline_hash, baseline_len = _measure("python-docx", path)
+            streaming_s, streaming_mb, streaming_hash, streaming_len = _measure("streaming", path)
+            assert (baseline_hash, baseline_len) == (streaming_hash, streaming_len), "extracted texts differ"
+            print(f"{count:10d} {os.path.getsize(path) / 1024 / 1024:8.1f} {baseline_s:14.2f} {baseline_mb:7.0f} "
+                  f"{streaming_s:12.2f} {streaming_mb:7.0f}")
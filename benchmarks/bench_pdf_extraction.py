@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# benchmarks/bench_pdf_extraction.py
+#
+# Compares PDF text extraction strategies on the PDFs under data/raw:
+#   concat    - the previous page-by-page `text += page.get_text()` loop
+#   join      - iter_pdf_pages + a single join (what runs without an executor)
+#   parallel  - page ranges spread across a process pool (what the server runs)
+# Run from the repository root:
+#     python benchmarks/bench_pdf_extraction.py [--workers 4] [--pages-per-task 16] [--min-pages 300]
+# --min-pages repeats each document's pages into an in-memory PDF of at least that many pages,
+# to approximate long proposals with annexures.
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "app"))
+
+import src.processing.document_parser as document_parser  # noqa: E402
+
+
+def _concat_baseline(data: bytes) -> str:
+    import fitz
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        text = ""
+        for page in doc:
+            text += page.get_text()
+        return text
+
+
+def _join(data: bytes) -> str:
+    return "".join(document_parser.iter_pdf_pages(data))
+
+
+def _inflate(data: bytes, min_pages: int) -> bytes:
+    """Repeats the document's pages until it has at least min_pages pages."""
+    import fitz
+    fitz.TOOLS.mupdf_display_errors(False)  # repeated pages repeat their broken-annotation warnings
+    with fitz.open(stream=data, filetype="pdf") as source, fitz.open() as inflated:
+        while inflated.page_count < min_pages:
+            inflated.insert_pdf(source)
+        return inflated.tobytes()
+
+
+def _time(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF text extraction benchmark")
+    parser.add_argument("--pattern", default=os.path.join(REPO_ROOT, "data", "raw", "**", "*.pdf"))
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--pages-per-task", type=int, default=document_parser.PDF_PAGES_PER_TASK)
+    parser.add_argument("--min-pages", type=int, default=0, help="Inflate each PDF to at least this many pages")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    document_parser.PDF_PAGES_PER_TASK = args.pages_per_task
+    paths = sorted(glob.glob(args.pattern, recursive=True))
+    if not paths:
+        raise SystemExit(f"No PDFs match {args.pattern}")
+
+    print(f"workers={args.workers} pages_per_task={args.pages_per_task}")
+    print(f"{'document':40} {'pages':>6} {'concat ms':>10} {'join ms':>9} {'parallel ms':>12} {'speed-up':>9}")
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        pool.submit(len, b"").result()  # start the workers outside the timings
+        for path in paths:
+            with open(path, "rb") as f:
+                data = f.read()
+            if args.min_pages:
+                data = _inflate(data, args.min_pages)
+            import fitz
+            with fitz.open(stream=data, filetype="pdf") as doc:
+                pages = doc.page_count
+
+            expected = _concat_baseline(data)
+            assert _join(data) == expected
+            assert document_parser.extract_text_from_pdf(data, pool) == expected
+
+            concat_ms = _time(lambda: _concat_baseline(data), args.repeats)
+            join_ms = _time(lambda: _join(data), args.repeats)
+            parallel_ms = _time(lambda: document_parser.extract_text_from_pdf(data, pool), args.repeats)
+            print(f"{os.path.basename(path)[:40]:40} {pages:6d} {concat_ms:10.1f} {join_ms:9.1f} "
+                  f"{parallel_ms:12.1f} {concat_ms / parallel_ms:8.2f}x")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# benchmarks/bench_section_extraction.py
+#
+# Compares section extraction strategies on multi-megabyte texts built by repeating the
+# knowledge-base proposals:
+#   split    - the previous extract_sections (pattern rebuilt per call, re.split, copied strings)
+#   extract  - SectionExtractor.extract (precompiled, single finditer pass, one slice per section)
+#   spans    - SectionExtractor.spans (offsets only, no section text copied)
+# Run from the repository root:
+#     python benchmarks/bench_section_extraction.py [--sizes-mb 1 4 16] [--repeats 5]
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "app"))
+
+from src.processing.sections import DEFAULT_SECTION_HEADERS, SectionExtractor  # noqa: E402
+
+
+def _split_baseline(text: str) -> dict:
+    pattern = r"^\s*(?:\d+\.\s*)?(" + "|".join(DEFAULT_SECTION_HEADERS) + r")\b"
+    parts = re.split(pattern, text, flags=re.IGNORECASE | re.MULTILINE)
+    if len(parts) <= 1:
+        return {"unclassified": text.strip()}
+    sections = {}
+    if parts[0].strip():
+        sections["preamble"] = parts[0].strip()
+    for i in range(1, len(parts), 2):
+        sections[parts[i].strip().lower().replace(" & ", "_and_").replace(" ", "_")] = parts[i + 1].strip()
+    return sections
+
+
+def _build_text(projects: list, size_mb: float) -> str:
+    target = int(size_mb * 1024 * 1024)
+    pieces, length = [], 0
+    while length < target:
+        for project in projects:
+            pieces.append(project["full_text"])
+            length += len(project["full_text"]) + 2
+    return "\n\n".join(pieces)
+
+
+def _time(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Section extraction benchmark")
+    parser.add_argument("--data", default=os.path.join(REPO_ROOT, "data", "processed", "knowledge_base.json"))
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.data, "r", encoding="utf-8") as f:
+        projects = json.load(f)
+    extractor = SectionExtractor(DEFAULT_SECTION_HEADERS)
+
+    print(f"{'size MB':>8} {'sections':>9} {'split ms':>9} {'extract ms':>11} {'spans ms':>9} {'speed-up':>9}")
+    for size_mb in args.sizes_mb:
+        text = _build_text(projects, size_mb)
+        expected = _split_baseline(text)
+        assert list(extractor.extract(text).items()) == list(expected.items())
+        sections = len(extractor.spans(text))
+
+        split_ms = _time(lambda: _split_baseline(text), args.repeats)
+        extract_ms = _time(lambda: extractor.extract(text), args.repeats)
+        spans_ms = _time(lambda: extractor.spans(text), args.repeats)
+        print(f"{len(text) / 1024 / 1024:8.1f} {sections:9d} {split_ms:9.1f} {extract_ms:11.1f} "
+              f"{spans_ms:9.1f} {split_ms / spans_ms:8.2f}x")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# benchmarks/bench_startup.py
+#
+# Measures the server's import-time budget and time-to-first-/api/-response.
+# Run from the repository root:
+#     python benchmarks/bench_startup.py [--import-budget-ms 1500] [--ttfb-budget-ms 5000]
+# Exits with status 1 when a budget is exceeded, so it can guard against regressions in CI.
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_ROOT, "app")
+
+
+def measure_import_time(top: int = 15):
+    """Runs `python -X importtime -c 'import main'` and returns (total_ms, modules with the most self time)."""
+    env = dict(os.environ, PYTHONPATH=APP_DIR, EVALUATOR_WARMUP="0")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        print(completed.stderr[-2000:])
+        raise SystemExit("Importing app/main.py failed.")
+
+    rows = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # Nesting depth is encoded as extra indentation after the single separating space
+        rows.append((int(cumulative_us), int(self_us), name[1:].rstrip()))
+
+    total_ms = next((cumulative / 1000 for cumulative, _, name in rows if name == "main"), 0.0)
+    heaviest = sorted(rows, key=lambda row: row[1], reverse=True)[:top]
+    return total_ms, heaviest
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_time_to_first_response(timeout: float = 120.0, warmup: str = "background") -> float:
+    """Starts uvicorn and returns the milliseconds until GET /api/ first answers 200."""
+    port = _free_port()
+    env = dict(os.environ, EVALUATOR_WARMUP=warmup)
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--app-dir", "app", "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise SystemExit("uvicorn exited before answering /api/.")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.02)
+        raise SystemExit(f"/api/ did not answer within {timeout}s.")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import-time and time-to-first-response benchmark")
+    parser.add_argument("--import-budget-ms", type=float, default=None, help="Fail if importing main takes longer")
+    parser.add_argument("--ttfb-budget-ms", type=float, default=None, help="Fail if /api/ takes longer to answer")
+    parser.add_argument("--warmup", default="background", choices=["background", "blocking", "0"],
+                        help="EVALUATOR_WARMUP mode for the time-to-first-response run")
+    parser.add_argument("--skip-server", action="store_true", help="Only measure import time")
+    args = parser.parse_args()
+
+    failed = False
+
+    total_ms, heaviest = measure_import_time()
+    print(f"--- Import time of app/main.py: {total_ms:.1f} ms ---")
+    for cumulative_us, self_us, name in heaviest:
+        print(f"{self_us / 1000:9.1f} ms self  ({cumulative_us / 1000:7.1f} ms cumulative)  {name.strip()}")
+    if args.import_budget_ms is not None and total_ms > args.import_budget_ms:
+        print(f"FAIL: import time {total_ms:.1f} ms exceeds budget of {args.import_budget_ms} ms")
+        failed = True
+
+    if not args.skip_server:
+        ttfb_ms = measure_time_to_first_response(warmup=args.warmup)
+        print(f"--- Time to first /api/ response (warmup={args.warmup}): {ttfb_ms:.1f} ms ---")
+        if args.ttfb_budget_ms is not None and ttfb_ms > args.ttfb_budget_ms:
+            print(f"FAIL: time to first response {ttfb_ms:.1f} ms exceeds budget of {args.ttfb_budget_ms} ms")
+            failed = True
+
+    sys.exit(1 if failed else 0)
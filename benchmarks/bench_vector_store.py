@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# benchmarks/bench_vector_store.py
+#
+# Compares novelty-query latency of the vector-store backends on synthetic unit vectors.
+# Run from the repository root:
+#     python benchmarks/bench_vector_store.py [--sizes 1000 100000 1000000] [--with-chroma]
+# The 1M-vector store needs about 1.5 GB of disk (384-dim float32); it is memory-mapped, not loaded.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_ROOT, "app"))
+
+from src.models.vector_store import ChromaVectorStore, NumpyVectorStore  # noqa: E402
+
+CHROMA_ADD_BATCH = 5000
+
+
+def _random_unit_vectors(rng, n: int, dim: int) -> np.ndarray:
+    vectors = rng.standard_normal((n, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def _time_queries(store, queries: np.ndarray, batch: int, k: int, repeats: int) -> tuple:
+    """Returns (p50 ms, p95 ms) per query call of `batch` vectors."""
+    store.query(query_embeddings=queries[:batch].tolist(), n_results=k)  # warm the page cache
+    timings = []
+    for r in range(repeats):
+        chunk = queries[(r * batch) % len(queries):][:batch]
+        started = time.perf_counter()
+        store.query(query_embeddings=chunk.tolist(), n_results=k)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(0.95 * (len(timings) - 1))]
+
+
+def _build_numpy(path: str, vectors: np.ndarray) -> NumpyVectorStore:
+    store = NumpyVectorStore(path)
+    store.build([f"v{i}" for i in range(len(vectors))], vectors, [{"title": f"v{i}"} for i in range(len(vectors))])
+    return store
+
+
+def _build_chroma(path: str, vectors: np.ndarray) -> ChromaVectorStore:
+    import chromadb
+    client = chromadb.PersistentClient(path=path)
+    store = ChromaVectorStore(client.get_or_create_collection(name="bench"))
+    for start in range(0, len(vectors), CHROMA_ADD_BATCH):
+        rows = range(start, min(start + CHROMA_ADD_BATCH, len(vectors)))
+        store.add([f"v{i}" for i in rows], vectors[rows.start:rows.stop].tolist(), [{"title": f"v{i}"} for i in rows])
+    return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector-store query latency benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384, help="Embedding size (all-MiniLM-L6-v2 is 384)")
+    parser.add_argument("--k", type=int, default=3, help="n_results per query, as in calculate_novelty")
+    parser.add_argument("--batches", type=int, nargs="+", default=[1, 16], help="Query vectors per call")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--with-chroma", action="store_true", help="Also benchmark the Chroma backend")
+    parser.add_argument("--chroma-max-size", type=int, default=100000, help="Skip Chroma above this size (slow to build)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = _random_unit_vectors(rng, 256, args.dim)
+    print(f"{'backend':8} {'vectors':>9} {'batch':>5} {'build s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+
+    for size in args.sizes:
+        vectors = _random_unit_vectors(rng, size, args.dim)
+        backends = [("numpy", _build_numpy)]
+        if args.with_chroma and size <= args.chroma_max_size:
+            backends.append(("chroma", _build_chroma))
+        for name, build in backends:
+            with tempfile.TemporaryDirectory() as path:
+                started = time.perf_counter()
+                store = build(path, vectors)
+                build_seconds = time.perf_counter() - started
+                for batch in args.batches:
+                    p50, p95 = _time_queries(store, queries, batch, args.k, args.repeats)
+                    print(f"{name:8} {size:9d} {batch:5d} {build_seconds:8.2f} {p50:8.2f} {p95:8.2f}")
+                del store
+        del vectors
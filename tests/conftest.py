@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import os
+import sys
+
+# The application imports its modules as src.*, relative to app/ (as run_server.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app"))
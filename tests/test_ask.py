@@ -0,0 +1,169 @@
+# tests/test_ask.py
+
+import asyncio
+import hashlib
+import json
+import zlib
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src.core.result_cache import ResultCache, make_cache_key
+from src.models import document_index
+from src.models.document_index import DocumentIndexCache
+from src.models.document_qa import AskMetrics, GenerationLimiter
+from src.processing.document_parser import PARSER_VERSION
+
+PROPOSAL_TEXT = """1. Introduction
+Coal mines release methane that is lost today.
+2. Methodology
+We will capture methane with membrane separation units and field trials.
+"""
+PROPOSAL_ID = hashlib.sha256(PROPOSAL_TEXT.encode("utf-8")).hexdigest()
+
+
+class HashingEncoder:
+    """Bag-of-words embeddings: texts sharing words are similar, no model download needed."""
+
+    def __init__(self, dimensions: int = 64):
+        self.dimensions = dimensions
+
+    def encode(self, texts: list, **kwargs):
+        embeddings = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, zlib.crc32(word.strip(".,?").encode()) % self.dimensions] += 1
+        return embeddings
+
+
+class ScriptedBackend:
+    """Streams fixed pieces; with endless=True it never finishes, so only a disconnect stops it."""
+
+    name = "scripted"
+
+    def __init__(self, pieces: list, endless: bool = False):
+        self.pieces = pieces
+        self.endless = endless
+        self.closed = False
+
+    async def stream(self, prompt: str):
+        try:
+            for piece in self.pieces:
+                yield piece
+            while self.endless:
+                await asyncio.sleep(0.01)
+                yield "."
+        finally:
+            self.closed = True
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = ScriptedBackend(["Membrane ", "separation."])
+    encoder = HashingEncoder()
+    monkeypatch.setattr(main, "get_llm_backend", lambda: backend)
+    monkeypatch.setattr(main.EMBEDDING_BATCHER, "model_provider", lambda: encoder)
+    monkeypatch.setattr(document_index, "get_embedding_model", lambda: encoder)
+    monkeypatch.setattr(document_index, "DOCUMENT_INDEXES", DocumentIndexCache())
+    monkeypatch.setattr(main, "RETRIEVAL_CACHE", ResultCache(16, None, name="retrieval"))
+    monkeypatch.setattr(main, "TEXT_CACHE", ResultCache(4, None, name="text"))
+    monkeypatch.setattr(main, "LLM_LIMITER", GenerationLimiter(max_concurrent=1, max_waiting=0))
+    monkeypatch.setattr(main, "ASK_METRICS", AskMetrics())
+    # As left behind by evaluating the proposal
+    main.TEXT_CACHE.put(make_cache_key(PROPOSAL_ID, PARSER_VERSION), {"text": PROPOSAL_TEXT, "budget": None})
+    return backend
+
+
+def ask(client, question: str, proposal_id: str = PROPOSAL_ID):
+    with client.stream("POST", f"/proposals/{proposal_id}/ask", json={"question": question, "k": 1}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_answer_is_streamed_as_ndjson_events(backend):
+    events = ask(TestClient(main.app), "How do membrane separation units work?")
+
+    assert [event["event"] for event in events] == ["context", "token", "token", "done"]
+    context = events[0]
+    assert context["proposal_id"] == PROPOSAL_ID
+    assert [passage["section"] for passage in context["passages"]] == ["methodology"]
+    assert context["retrieval_cached"] is False
+    assert "".join(event["text"] for event in events[1:-1]) == "Membrane separation."
+    assert events[-1]["tokens"] == 2
+    assert events[-1]["backend"] == "scripted"
+    assert events[-1]["ttft_ms"] is not None
+    assert backend.closed
+    assert main.LLM_LIMITER.active == 0
+
+
+def test_follow_up_questions_reuse_the_cached_index(backend):
+    client = TestClient(main.app)
+    ask(client, "How do membrane separation units work?")
+    repeated = ask(client, "  how do MEMBRANE separation units work? ")
+    follow_up = ask(client, "Where is methane released?")
+
+    assert repeated[0]["retrieval_cached"] is True
+    assert follow_up[0]["retrieval_cached"] is False
+    # The proposal was chunked and embedded once; the follow-up only embedded its question
+    stats = document_index.DOCUMENT_INDEXES.stats()
+    assert (stats["misses"], stats["hits"], stats["entries"]) == (1, 1, 1)
+    assert main.ASK_METRICS.retrieval_cache_hits == 1
+
+
+def test_unknown_proposal_is_404(backend):
+    response = TestClient(main.app).post(f"/proposals/{'0' * 64}/ask", json={"question": "What is proposed?"})
+
+    assert response.status_code == 404
+    assert not document_index.DOCUMENT_INDEXES._building
+
+
+def test_full_limiter_answers_503_before_streaming(backend):
+    main.LLM_LIMITER.active = 1  # the only slot is taken and nobody may wait
+
+    response = TestClient(main.app).post(f"/proposals/{PROPOSAL_ID}/ask", json={"question": "What is proposed?"})
+
+    assert response.status_code == 503
+    assert main.ASK_METRICS.rejected == 1
+    assert main.ASK_METRICS.questions == 0
+
+
+def test_client_disconnect_closes_the_generation(backend):
+    backend.endless = True
+    body = json.dumps({"question": "How do membrane separation units work?"}).encode()
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": f"/proposals/{PROPOSAL_ID}/ask", "raw_path": f"/proposals/{PROPOSAL_ID}/ask".encode(),
+        "root_path": "", "query_string": b"", "server": ("testserver", 80), "client": ("testclient", 50000),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    }
+
+    async def run():
+        requests = [{"type": "http.request", "body": body, "more_body": False}]
+        token_sent = asyncio.Event()
+        chunks = []
+
+        async def receive():
+            if requests:
+                return requests.pop()
+            await token_sent.wait()  # the client goes away once the answer has started
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and message.get("body"):
+                chunks.append(json.loads(message["body"]))
+                if chunks[-1]["event"] == "token":
+                    token_sent.set()
+
+        await asyncio.wait_for(main.app(scope, receive, send), timeout=5)
+        return chunks
+
+    events = asyncio.run(run())
+
+    assert events[0]["event"] == "context"
+    assert "done" not in [event["event"] for event in events]
+    assert backend.closed
+    assert (main.LLM_LIMITER.active, main.LLM_LIMITER.waiting) == (0, 0)
+    assert main.ASK_METRICS.answers == 0
@@ -0,0 +1,71 @@
+# tests/test_budget_extractor.py
+
+from src.processing.budget_extractor import extract_budget
+
+
+def test_rupee_amounts_ending_in_slash_dash():
+    budget = extract_budget("Budget\nEquipment Rs. 18,00,000/-\nTravel Rs. 2,00,000/-\nTotal Rs. 20,00,000/-\n")
+
+    assert budget == {
+        "total_cost": 2000000,
+        "costs": {"equipment": 1800000, "travel": 200000},
+        "items": ["Equipment", "Travel"]
+    }
+
+
+def test_references_and_dates_with_slashes_are_not_amounts():
+    budget = extract_budget("Budget\nEquipment Rs. 5,00,000\nSanction letter 267310/ dated 12/05/2015\n")
+
+    assert budget["costs"] == {"equipment": 500000}
+
+
+def test_lakh_crore_and_thousand_units():
+    budget = extract_budget(
+        "Budget\nEquipment: Rs. 3.15 lakh\nPersonnel: ₹1.2 crore\nTravel: Rs. 50 thousand\nConsumables Rs 75k\n"
+    )
+
+    assert budget["costs"] == {"equipment": 315000, "personnel": 12000000, "travel": 50000, "consumables": 75000}
+    assert budget["total_cost"] == 12440000
+
+
+def test_declared_unit_applies_to_bare_numbers():
+    budget = extract_budget("Budget Estimate (Rs. in lakhs)\nEquipment 12.5\nTravel (TA/DA) 3.15\nTotal 15.65\n")
+
+    assert budget["costs"] == {"equipment": 1250000, "travel": 315000}
+    assert budget["total_cost"] == 1565000
+
+
+def test_percentages_durations_and_dates_are_not_amounts():
+    assert extract_budget("Yield improves by 15% and losses fall by 20 %.\nIt runs for 36 months from 12.05.2015.\n") is None
+
+    budget = extract_budget("Budget\nEquipment Rs. 5,00,000\nPersonnel for 24 months\nContingency 5%\n")
+    assert budget == {"total_cost": 500000, "costs": {"equipment": 500000}, "items": ["Equipment"]}
+
+
+def test_year_columns_are_summed_without_a_total_column():
+    table = [
+        ["Item (Rs. in lakhs)", "Year 1", "Year 2", "Year 3"],
+        ["Equipment", "10.0", "2.0", "0"],
+        ["Salaries", "4.0", "4.5", "5.0"],
+    ]
+
+    budget = extract_budget("", [table])
+
+    assert budget["costs"] == {"equipment": 1200000, "personnel": 1350000}
+    assert budget["total_cost"] == 2550000
+
+
+def test_total_column_wins_over_year_columns():
+    table = [["Item", "1st Yr.", "2nd Yr.", "Total"], ["Equipment", "10,00,000", "8,00,000", "18,00,000"]]
+
+    assert extract_budget("", [table])["costs"] == {"equipment": 1800000}
+
+
+def test_tab_separated_rows_are_read_as_a_table():
+    text = "Budget\nItem\tYear 1\tYear 2\tTotal\nEquipment\t10,00,000\t8,00,000\t18,00,000\nTotal\t\t\t18,00,000\n"
+
+    assert extract_budget(text) == {"total_cost": 1800000, "costs": {"equipment": 1800000}, "items": ["Equipment"]}
+
+
+def test_stated_total_without_categories_has_no_costs():
+    assert extract_budget("Budget\nTotal project cost: Rs. 45 lakh\n") == {"total_cost": 4500000, "costs": {}, "items": []}
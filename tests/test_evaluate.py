@@ -0,0 +1,91 @@
+# tests/test_evaluate.py
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from src.core.result_cache import ResultCache
+from src.processing.budget_extractor import extract_budget
+
+PROPOSAL_TEXT = """1. Introduction
+Coal mines release methane that is lost today.
+2. Methodology
+We will capture methane with membrane separation units and field trials.
+3. Budget
+Equipment Rs. 18,00,000/-
+Travel Rs. 2,00,000/-
+Total Rs. 20,00,000/-
+"""
+
+
+async def novel(contents: list) -> list:
+    return [
+        {"novelty_passed": True, "max_similarity_percentage": 10.0, "novelty_mode": main.NOVELTY_MODE}
+        for _ in contents
+    ]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "_calculate_novelty", novel)
+    monkeypatch.setattr(main, "RESULT_CACHE", ResultCache(8, None, name="result"))
+    monkeypatch.setattr(main, "TEXT_CACHE", ResultCache(8, None, name="text"))
+    return TestClient(main.app)
+
+
+def upload(*names: str) -> list:
+    return [("files", (name, (PROPOSAL_TEXT + name).encode(), "text/plain")) for name in names]
+
+
+def test_risk_pipeline_failure_is_reported_per_file(client, monkeypatch):
+    def broken():
+        raise FileNotFoundError("trained_models/risk_pipeline.joblib")
+    monkeypatch.setattr(main, "get_risk_pipeline", broken)
+
+    response = client.post("/evaluate/proposals/", files=upload("a.txt", "b.txt"))
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [(r["filename"], r["status"]) for r in results] == [("a.txt", "error"), ("b.txt", "error")]
+    assert "risk_pipeline.joblib" in results[0]["error_message"]
+
+
+def test_malformed_budget_only_fails_its_own_file(client, monkeypatch):
+    budget_of = main._budget_of
+
+    def malformed_for_b(processed_data: dict) -> tuple:
+        if "b.txt" in " ".join(processed_data["content"].values()):
+            return {"total_cost": 100, "costs": {"equipment": "n/a"}, "items": []}, "extracted"
+        return budget_of(processed_data)
+    monkeypatch.setattr(main, "_budget_of", malformed_for_b)
+
+    response = client.post("/evaluate/proposals/", files=upload("a.txt", "b.txt"))
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0]["financial_analysis"]["budget_source"] == "extracted"
+    assert (results[1]["filename"], results[1]["status"]) == ("b.txt", "error")
+
+
+def test_total_only_budget_is_flagged_and_fails():
+    budget, source = main._budget_of({"budget": extract_budget("Budget\nTotal project cost: Rs. 45 lakh\n")})
+
+    assert (budget["total_cost"], source) == (4500000, "total_only")
+    report = main._analyze_budget(budget)
+    assert report["financial_passed"] is False
+    assert "Cost Breakdown" in [result["rule"] for result in report["rules_analysis"] if result["status"] == "FAIL"]
+    assert main._budget_of({"budget": None}) == (main.DEFAULT_BUDGET, "default")
+
+
+def test_cache_hit_reports_the_current_upload_name(client, monkeypatch):
+    monkeypatch.setattr(main, "get_risk_pipeline", lambda: None)
+    monkeypatch.setattr(main, "predict_risk", lambda text, pipeline: {"risk_passed": True, "confidence_score": "90%"})
+    content = PROPOSAL_TEXT.encode()
+
+    first = client.post("/evaluate/proposal/", files={"file": ("first.txt", content, "text/plain")}).json()
+    again = client.post("/evaluate/proposal/", files={"file": ("renamed.txt", content, "text/plain")}).json()
+
+    assert again["from_cache"] is True
+    assert again["document_content"]["source_file"] == "renamed.txt"
+    assert again["preview"]["filename"] == "renamed.txt"
+    assert first["document_content"]["source_file"] == "first.txt"
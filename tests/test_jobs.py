@@ -0,0 +1,114 @@
+# tests/test_jobs.py
+
+import asyncio
+import time
+
+import pytest
+
+from src.core.jobs import JobQueue, JobWorkerPool
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    def make(**kwargs):
+        return JobQueue(str(tmp_path / "jobs.sqlite"), **kwargs)
+    return make
+
+
+def test_claim_and_complete(make_queue):
+    queue = make_queue()
+    job_id = queue.submit([("a.txt", b"aaa", "sha-a"), ("b.txt", b"bbb", "sha-b")])
+
+    task = queue.claim("w1")
+    assert (task["filename"], task["content"], task["attempts"]) == ("a.txt", b"aaa", 1)
+    assert queue.claim("w2")["filename"] == "b.txt"
+    assert queue.claim("w3") is None
+
+    assert queue.complete(task["id"], "w1", {"score": 1})
+    tasks = queue.job_status(job_id)["tasks"]
+    assert [t["status"] for t in tasks] == ["done", "running"]
+    assert tasks[0]["result"] == {"score": 1}
+    # At most once: a second completion of the same task is rejected
+    assert not queue.complete(task["id"], "w1", {"score": 2})
+    assert queue.job_status(job_id)["tasks"][0]["result"] == {"score": 1}
+
+
+def test_fail_requeues_until_attempts_are_used_up(make_queue):
+    queue = make_queue(max_attempts=2)
+    job_id = queue.submit([("a.txt", b"aaa", "sha-a")])
+
+    task = queue.claim("w1")
+    assert queue.fail(task["id"], "w1", "boom")
+    assert queue.job_status(job_id)["tasks"][0]["status"] == "queued"
+
+    task = queue.claim("w2")
+    assert task["attempts"] == 2
+    assert queue.fail(task["id"], "w2", "boom again")
+    status = queue.job_status(job_id)["tasks"][0]
+    assert (status["status"], status["error"]) == ("failed", "boom again")
+    assert queue.claim("w3") is None
+
+
+def test_expired_lease_is_reclaimed_and_stale_owner_rejected(make_queue):
+    queue = make_queue(lease_seconds=0.05)
+    job_id = queue.submit([("a.txt", b"aaa", "sha-a")])
+
+    first = queue.claim("w1")
+    assert queue.claim("w2") is None
+    time.sleep(0.1)
+    second = queue.claim("w2")
+    assert second["id"] == first["id"] and second["attempts"] == 2
+
+    assert not queue.complete(first["id"], "w1", {"from": "w1"})
+    assert not queue.renew(first["id"], "w1")
+    assert queue.complete(second["id"], "w2", {"from": "w2"})
+    assert queue.job_status(job_id)["tasks"][0]["result"] == {"from": "w2"}
+
+
+def test_expired_lease_on_last_attempt_fails_the_task(make_queue):
+    queue = make_queue(max_attempts=1, lease_seconds=0.05)
+    job_id = queue.submit([("a.txt", b"aaa", "sha-a")])
+
+    queue.claim("w1")
+    time.sleep(0.1)
+    assert queue.claim("w2") is None
+    status = queue.job_status(job_id)["tasks"][0]
+    assert (status["status"], status["error"]) == ("failed", "Lease expired")
+
+
+def test_renew_extends_the_lease(make_queue):
+    queue = make_queue(lease_seconds=0.1)
+    queue.submit([("a.txt", b"aaa", "sha-a")])
+
+    task = queue.claim("w1")
+    for _ in range(4):
+        time.sleep(0.05)
+        assert queue.renew(task["id"], "w1")
+    assert queue.claim("w2") is None
+
+
+def test_worker_renews_lease_during_long_evaluation(make_queue):
+    queue = make_queue(lease_seconds=0.15)
+    job_id = queue.submit([("a.txt", b"aaa", "sha-a")])
+    evaluated = []
+
+    async def evaluate(task):
+        evaluated.append(task["id"])
+        await asyncio.sleep(0.6)  # four lease periods
+        return {"status": "success"}
+
+    async def run():
+        pools = [JobWorkerPool(queue, evaluate, workers=1, poll_seconds=0.02) for _ in range(2)]
+        for pool in pools:
+            pool.start()
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if queue.job_status(job_id)["tasks"][0]["status"] == "done":
+                break
+        for pool in pools:
+            pool.stop()
+
+    asyncio.run(run())
+    status = queue.job_status(job_id)["tasks"][0]
+    assert len(evaluated) == 1
+    assert (status["status"], status["attempts"], status["result"]) == ("done", 1, {"status": "success"})
@@ -1,74 +1,185 @@
 # train_model.py
 
+import argparse
 import json
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
+import sys
+from itertools import islice
 from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
 import joblib
 import os
 
+# The feature pipeline lives in the app package so the API can unpickle it
+sys.path.insert(0, 'app')
+from src.models.risk_features import build_risk_pipeline, build_streaming_risk_pipeline
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 def create_feature_dataset(data_path: str = 'data/processed/knowledge_base.json'):
     """
-    Loads the knowledge base and engineers features for the ML model.
+    Loads the knowledge base as raw texts and labels; feature engineering is part of the pipeline.
     """
-    print("--- Starting Feature Engineering ---")
+    print("--- Loading Training Data ---")
     try:
-        df = pd.read_json(data_path)
+        with open(data_path, 'r', encoding='utf-8') as f:
+            knowledge_base = json.load(f)
     except FileNotFoundError:
         print(f"Error: {data_path} not found.")
-        return None, None, None
-    df['text_length'] = df['full_text'].apply(lambda x: len(x.split()))
-    tfidf_vectorizer = TfidfVectorizer(max_features=500, stop_words='english', ngram_range=(1, 2))
-    tfidf_features = tfidf_vectorizer.fit_transform(df['full_text'])
-    tfidf_df = pd.DataFrame(tfidf_features.toarray(), columns=tfidf_vectorizer.get_feature_names_out())
-    df['label'] = df['status'].apply(lambda x: 1 if str(x).lower() == 'approved' else 0)
-    features_df = pd.concat([df[['text_length']], tfidf_df], axis=1)
-    X = features_df
-    y = df['label']
-    print("--- Feature Engineering Complete ---")
-    return X, y, tfidf_vectorizer
-
-def train_and_save_model(X, y, vectorizer, model_dir="trained_models"):
+        return None, None
+    X = [project['full_text'] for project in knowledge_base]
+    y = [1 if str(project['status']).lower() == 'approved' else 0 for project in knowledge_base]
+    print(f"--- Loaded {len(X)} projects ---")
+    return X, y
+
+def train_and_save_model(X, y, model_dir="trained_models"):
     """
-    Splits data, trains a model, evaluates it, and saves the model and vectorizer.
+    Splits data, fits the sparse feature + classifier pipeline, evaluates it, and saves it.
     """
     print("\n--- Starting Model Training ---")
-    
+
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-    print(f"Training set size: {X_train.shape[0]} samples, Testing set size: {X_test.shape[0]} samples")
+    print(f"Training set size: {len(X_train)} samples, Testing set size: {len(X_test)} samples")
 
-    model = LogisticRegression(max_iter=1000)
-    print("Training Logistic Regression model...")
-    model.fit(X_train, y_train)
-    print("Model training complete.")
+    pipeline = build_risk_pipeline()
+    print("Training TF-IDF + text length -> Logistic Regression pipeline...")
+    pipeline.fit(X_train, y_train)
+    print(f"Model training complete ({pipeline.named_steps['classifier'].n_features_in_} features).")
 
     print("\n--- Evaluating Model ---")
-    y_pred = model.predict(X_test)
+    y_pred = pipeline.predict(X_test)
     accuracy = accuracy_score(y_test, y_pred)
     print(f"Model Accuracy on Test Set: {accuracy * 100:.2f}%")
-    
-    print("\n--- Saving Model and Vectorizer ---")
+
+    print("\n--- Saving Pipeline ---")
+    os.makedirs(model_dir, exist_ok=True)
+
+    pipeline_path = os.path.join(model_dir, "risk_pipeline.joblib")
+    joblib.dump(pipeline, pipeline_path)
+    print(f"Pipeline saved to: {pipeline_path}")
+
+    return pipeline
+
+def peak_memory_mb() -> float:
+    """Peak resident set size of this process so far, in MB (None where the platform cannot tell)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def iter_projects(data_path: str, read_size: int = 1 << 16):
+    """
+    Yields projects one at a time from a JSON array (knowledge_base.json) or a JSON Lines file,
+    reading read_size characters at a time instead of loading the whole file.
+    """
+    decoder = json.JSONDecoder()
+    with open(data_path, 'r', encoding='utf-8') as f:
+        buffer = f.read(read_size).lstrip()
+        if buffer.startswith('['):
+            buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip().lstrip(',').lstrip()
+            if buffer.startswith(']'):
+                return
+            try:
+                project, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                more = f.read(read_size)
+                if not more:
+                    if buffer.strip():
+                        raise ValueError(f"Truncated or invalid JSON in {data_path}")
+                    return
+                buffer += more
+                continue
+            yield project
+            buffer = buffer[end:]
+
+def iter_labelled_chunks(data_path: str, chunk_size: int, holdout: bool, holdout_every: int = 5):
+    """
+    Streams (texts, labels) chunks. Every holdout_every-th project is held out for evaluation;
+    holdout=True yields only those, holdout=False only the training ones.
+    """
+    rows = (
+        (project['full_text'], 1 if str(project['status']).lower() == 'approved' else 0)
+        for i, project in enumerate(iter_projects(data_path))
+        if (i % holdout_every == 0) == holdout
+    )
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        texts, labels = zip(*chunk)
+        yield list(texts), list(labels)
+
+def train_streaming(data_path: str = 'data/processed/knowledge_base.json', model_dir: str = "trained_models",
+                    chunk_size: int = 1000, epochs: int = 5):
+    """
+    Out-of-core training: projects are read lazily, hashed (no vocabulary pass) and fed to an
+    SGD classifier with partial_fit, one chunk at a time, so memory is bounded by chunk_size
+    rather than by the size of the knowledge base. Saves the same risk_pipeline.joblib artifact
+    the API loads.
+    """
+    print(f"--- Streaming training: chunks of {chunk_size} projects, {epochs} epochs ---")
+    pipeline = build_streaming_risk_pipeline()
+    features = pipeline.named_steps['features']
+    classifier = pipeline.named_steps['classifier']
+    # Hashing and text_length are stateless; fitting only validates their parameters
+    features.fit([""])
+
+    seen = 0
+    for epoch in range(epochs):
+        for texts, labels in iter_labelled_chunks(data_path, chunk_size, holdout=False):
+            classifier.partial_fit(features.transform(texts), labels, classes=[0, 1])
+            if epoch == 0:
+                seen += len(texts)
+        print(f"Epoch {epoch + 1}/{epochs} done ({seen} training projects), peak memory {peak_memory_mb() or 0:.1f} MB")
+    if seen == 0:
+        print("Error: no training projects found.")
+        return None
+
+    print("\n--- Evaluating Model on Held-out Projects ---")
+    correct = total = 0
+    for texts, labels in iter_labelled_chunks(data_path, chunk_size, holdout=True):
+        predictions = pipeline.predict(texts)
+        correct += int(sum(int(p == y) for p, y in zip(predictions, labels)))
+        total += len(labels)
+    if total:
+        print(f"Model Accuracy on Held-out Set: {correct / total * 100:.2f}% ({total} projects)")
+
     os.makedirs(model_dir, exist_ok=True)
-    
-    model_path = os.path.join(model_dir, "risk_model.joblib")
-    vectorizer_path = os.path.join(model_dir, "tfidf_vectorizer.joblib")
-    
-    joblib.dump(model, model_path)
-    joblib.dump(vectorizer, vectorizer_path)
-    
-    print(f"Model saved to: {model_path}")
-    print(f"Vectorizer saved to: {vectorizer_path}")
-    
-    return model
+    pipeline_path = os.path.join(model_dir, "risk_pipeline.joblib")
+    joblib.dump(pipeline, pipeline_path)
+    print(f"Pipeline saved to: {pipeline_path}")
+    return pipeline
 
 # --- Main block for running the full ML pipeline ---
 if __name__ == '__main__':
-    X_dataset, y_dataset, tfidf_vectorizer = create_feature_dataset()
-    
-    if X_dataset is not None and y_dataset is not None:
-        if len(y_dataset.unique()) < 2:
-            print("\nError: The dataset has only one class. Cannot train a model.")
-        else:
-            train_and_save_model(X_dataset, y_dataset, tfidf_vectorizer)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the risk pipeline used by the API")
+    parser.add_argument("--data", default='data/processed/knowledge_base.json', help="JSON array or JSON Lines of projects")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Out-of-core training (hashing features + SGD partial_fit) for knowledge bases that do not fit in memory")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Projects per partial_fit step in streaming mode")
+    parser.add_argument("--epochs", type=int, default=5, help="Passes over the data in streaming mode")
+    parser.add_argument("--memory-budget-mb", type=float, default=None, help="Exit with status 1 if peak memory exceeds this")
+    args = parser.parse_args()
+
+    if args.streaming:
+        train_streaming(args.data, chunk_size=args.chunk_size, epochs=args.epochs)
+    else:
+        X_dataset, y_dataset = create_feature_dataset(args.data)
+
+        if X_dataset is not None and y_dataset is not None:
+            if len(set(y_dataset)) < 2:
+                print("\nError: The dataset has only one class. Cannot train a model.")
+            else:
+                train_and_save_model(X_dataset, y_dataset)
+
+    peak = peak_memory_mb()
+    if peak is not None:
+        print(f"Peak memory: {peak:.1f} MB")
+        if args.memory_budget_mb is not None and peak > args.memory_budget_mb:
+            print(f"FAIL: peak memory {peak:.1f} MB exceeds budget of {args.memory_budget_mb} MB")
+            sys.exit(1)